@@ -0,0 +1,91 @@
+"""
+Admin Activity Log
+Audit entries are recorded in the same transaction as the admin change they
+describe. With ACTIVITY_LOG_BUFFERED they are instead handed, after commit,
+to a writer that batch-inserts every N entries or T milliseconds. Entries
+older than the retention window are rotated into activity_logs_archive so
+the live table (and the admin activity page) stays small.
+"""
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import insert, select
+from models import db, ActivityLog, ActivityLogArchive
+from batch_writer import BatchWriter, defer_until_commit, install_after_commit_handoff
+
+
+PENDING_KEY = "pending_activity_logs"
+ACTIVITY_SORTS = {"newest": (ActivityLog.date, True), "oldest": (ActivityLog.date, False)}
+ACTIVITY_PAGE_SIZE = 50
+RETENTION = timedelta(days=90)
+ROTATE_BATCH_SIZE = 1000
+COLUMNS = ("admin_id", "action", "target_type", "target_id", "details", "date")
+
+
+# ================= RECORDING =================
+def log_activity(admin_id, action, target_type, target_id, details=None):
+    """Record an admin action as part of the caller's transaction (no-op without an admin)"""
+    if not admin_id:
+        return
+    row = {"admin_id": admin_id, "action": action, "target_type": target_type,
+           "target_id": target_id, "details": details, "date": datetime.utcnow()}
+    if current_app.extensions.get("activity_log_writer") is None:
+        db.session.add(ActivityLog(**row))
+    else:
+        defer_until_commit(PENDING_KEY, [row])
+
+
+def write_activity(rows, executor=None):
+    executor = executor or db.session
+    executor.execute(insert(ActivityLog), rows)
+
+
+class ActivityLogWriter(BatchWriter):
+    """Inserts committed entries on a background thread, every batch_size entries or flush_interval_ms"""
+
+    def __init__(self, app, batch_size=100, flush_interval_ms=250, max_queue=10000):
+        super().__init__(app, write_activity, "activity-log-writer", max_queue=max_queue, batch_size=batch_size,
+                         flush_interval=flush_interval_ms / 1000.0)
+
+
+def install_writer(app, writer):
+    """Route log_activity() of this app through writer after each commit"""
+    install_after_commit_handoff(app, "activity_log_writer", PENDING_KEY, writer)
+
+
+# ================= READING =================
+def activity_in_range(start=None, end=None):
+    """Activity in [start, end); a range scan on the date index"""
+    query = ActivityLog.query
+    if start:
+        query = query.filter(ActivityLog.date >= start)
+    if end:
+        query = query.filter(ActivityLog.date < end)
+    return query
+
+
+# ================= ROTATION =================
+def rotate_activity_logs(retention=RETENTION, batch_size=ROTATE_BATCH_SIZE, max_batches=None):
+    """
+    Move entries older than retention into activity_logs_archive, batch_size
+    rows per transaction (copy and delete commit together); returns rows moved.
+    """
+    cutoff = datetime.utcnow() - retention
+    moved = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = db.session.scalars(
+            select(ActivityLog.id).where(ActivityLog.date < cutoff).order_by(ActivityLog.date).limit(batch_size)
+        ).all()
+        if not ids:
+            break
+        columns = [getattr(ActivityLog, name) for name in ("id",) + COLUMNS]
+        db.session.execute(
+            insert(ActivityLogArchive).from_select(["id", *COLUMNS], select(*columns).where(ActivityLog.id.in_(ids)))
+        )
+        ActivityLog.query.filter(ActivityLog.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        moved += len(ids)
+        batches += 1
+        if len(ids) < batch_size:
+            break
+    return moved
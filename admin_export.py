@@ -0,0 +1,99 @@
+"""
+Admin Exports
+Streams orders, users and activity logs as CSV or JSON Lines. Rows come
+from a Core SELECT with stream_results/yield_per and are encoded batch by
+batch, so an export of any size runs in constant memory: nothing is kept
+in an ORM identity map or in a full result list.
+"""
+import csv
+import io
+import json
+from collections import namedtuple
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import select
+from models import User, Order, ActivityLog
+
+
+YIELD_PER = 1000
+FORMATS = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+# date_column drives the range filter and the (indexed) export order
+Export = namedtuple("Export", ["columns", "statement", "date_column", "id_column"])
+
+EXPORTS = {
+    "orders": Export(
+        columns=["id", "user_id", "username", "order_date", "order_status", "total_price"],
+        statement=lambda: select(Order.id, Order.user_id, User.username, Order.order_date, Order.order_status,
+                                 Order.total_price).outerjoin(User, User.id == Order.user_id),
+        date_column=Order.order_date,
+        id_column=Order.id,
+    ),
+    "users": Export(
+        columns=["id", "username", "email", "account_status", "balance", "date_created"],
+        statement=lambda: select(User.id, User.username, User.email, User.account_status, User.balance,
+                                 User.date_created),
+        date_column=User.date_created,
+        id_column=User.id,
+    ),
+    "activity": Export(
+        columns=["id", "date", "admin_id", "action", "target_type", "target_id", "details"],
+        statement=lambda: select(ActivityLog.id, ActivityLog.date, ActivityLog.admin_id, ActivityLog.action,
+                                 ActivityLog.target_type, ActivityLog.target_id, ActivityLog.details),
+        date_column=ActivityLog.date,
+        id_column=ActivityLog.id,
+    ),
+}
+
+
+def export_statement(kind, start=None, end=None):
+    """SELECT for one export over [start, end), oldest first"""
+    export = EXPORTS[kind]
+    statement = export.statement()
+    if start:
+        statement = statement.where(export.date_column >= start)
+    if end:
+        statement = statement.where(export.date_column < end)
+    return statement.order_by(export.date_column, export.id_column)
+
+
+def stream_rows(engine, kind, start=None, end=None, yield_per=YIELD_PER):
+    """Yield lists of row tuples, yield_per rows at a time, over a streaming cursor"""
+    with engine.connect() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=yield_per).execute(
+            export_statement(kind, start, end)
+        )
+        for partition in result.partitions():
+            yield partition
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_csv(columns, batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_plain(value) for value in row] for row in batch)
+        yield buffer.getvalue()
+
+
+def encode_jsonl(columns, batches):
+    for batch in batches:
+        yield "".join(json.dumps(dict(zip(columns, map(_plain, row)))) + "\n" for row in batch)
+
+
+def generate_export(engine, kind, fmt, start=None, end=None):
+    """Chunks of the encoded export; raises KeyError for an unknown kind or format"""
+    columns = EXPORTS[kind].columns
+    encode = {"csv": encode_csv, "jsonl": encode_jsonl}[fmt]
+    return encode(columns, stream_rows(engine, kind, start, end))
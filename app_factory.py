@@ -3,8 +3,29 @@ Application Factory Pattern
 Creates and configures the Flask application instance
 """
 from flask import Flask
+from werkzeug.utils import import_string
 from models.database import db
+from db_profiles import apply_database_profile, install_sqlite_pragmas
+from instrumentation import create_instrumentation
 import os
+import threading
+
+
+# (module, attribute) of every blueprint, in registration order
+BLUEPRINTS = [
+    ("controllers.home_controller", "home_bp"),
+    ("controllers.auth_controller", "auth_bp"),
+    ("controllers.browse_controller", "browse_bp"),
+    ("controllers.cart_controller", "cart_bp"),
+    ("controllers.profile_controller", "profile_bp"),
+    ("controllers.admin_controller", "admin_bp"),
+    ("controllers.support_controller", "support_bp"),
+    ("controllers.review_controller", "review_bp"),
+    ("controllers.about_controller", "about_bp"),
+    ("controllers.wishlist_controller", "wishlist_bp"),
+    ("controllers.theme_controller", "theme_bp"),
+    ("controllers.language_controller", "language_bp"),
+]
 
 
 def create_app(config_name='development'):
@@ -18,15 +39,35 @@ def create_app(config_name='development'):
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or os.urandom(24)
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL') or 'sqlite:///gaming_store.db'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    apply_database_profile(app, config_name)
     app.config['UPLOAD_FOLDER'] = 'static/uploads/profiles'
     app.config['MAX_CONTENT_LENGTH'] = 5 * 1024 * 1024  # 5MB max file size
     app.config['PERMANENT_SESSION_LIFETIME'] = 86400  # 24 hours - for theme/language persistence
+    # Production workers neither create the schema nor import controllers until they are needed;
+    # run `flask init-db` once per deploy instead
+    production = config_name == 'production'
+    app.config['AUTO_INIT_DB'] = os.environ.get('AUTO_INIT_DB', '0' if production else '1') == '1'
+    app.config['LAZY_BLUEPRINTS'] = os.environ.get('LAZY_BLUEPRINTS', '1' if production else '0') == '1'
+    app.config['INSTRUMENTATION'] = os.environ.get('INSTRUMENTATION', '0') == '1'
+    app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+    app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR')
     
     # Initialize extensions
     db.init_app(app)
+    install_sqlite_pragmas(app, db)
+    create_instrumentation(app, db)  # app-level hooks, so they cover every blueprint, lazy or not
     
     # Register blueprints
-    register_blueprints(app)
+    if app.config['LAZY_BLUEPRINTS']:
+        LazyBlueprintLoader(app)
+    else:
+        register_blueprints(app)
+    
+    @app.cli.command("init-db")
+    def init_db_command():
+        """Create the schema and seed default data"""
+        init_database(app)
+        print("✓ Database initialized")
     
     # Add context processor for theme and language
     @app.context_processor
@@ -38,39 +79,44 @@ def create_app(config_name='development'):
         }
     
     # Initialize database
-    with app.app_context():
-        init_database(app)
+    if app.config['AUTO_INIT_DB']:
+        with app.app_context():
+            init_database(app)
     
     return app
 
 
 def register_blueprints(app):
     """Register all application blueprints"""
-    from controllers.home_controller import home_bp
-    from controllers.auth_controller import auth_bp
-    from controllers.browse_controller import browse_bp
-    from controllers.cart_controller import cart_bp
-    from controllers.profile_controller import profile_bp
-    from controllers.admin_controller import admin_bp
-    from controllers.support_controller import support_bp
-    from controllers.review_controller import review_bp
-    from controllers.about_controller import about_bp
-    from controllers.wishlist_controller import wishlist_bp
-    from controllers.theme_controller import theme_bp
-    from controllers.language_controller import language_bp
-    
-    app.register_blueprint(home_bp)
-    app.register_blueprint(auth_bp)
-    app.register_blueprint(browse_bp)
-    app.register_blueprint(cart_bp)
-    app.register_blueprint(profile_bp)
-    app.register_blueprint(admin_bp)
-    app.register_blueprint(support_bp)
-    app.register_blueprint(review_bp)
-    app.register_blueprint(about_bp)
-    app.register_blueprint(wishlist_bp)
-    app.register_blueprint(theme_bp)
-    app.register_blueprint(language_bp)
+    for module, name in BLUEPRINTS:
+        app.register_blueprint(import_string(f"{module}:{name}"))
+
+
+class LazyBlueprintLoader:
+    """
+    WSGI middleware that imports and registers the blueprints on the first
+    request instead of at boot, so processes that never serve a request
+    (CLI commands, pre-forking masters) skip the controller imports.
+    Call load() before using url_for outside a request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+        self._loaded = False
+        self._lock = threading.Lock()
+        app.wsgi_app = self
+
+    def load(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    register_blueprints(self.app)
+                    self._loaded = True
+
+    def __call__(self, environ, start_response):
+        self.load()
+        return self.wsgi_app(environ, start_response)
 
 
 def init_database(app):
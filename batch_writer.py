@@ -0,0 +1,150 @@
+"""
+Background Batch Writer
+Takes write-only rows (notifications, audit entries) off the request path.
+Rows collected during a transaction are handed over after it commits (and
+dropped if it rolls back), put on a bounded in-process queue and inserted
+by a single thread, every batch_size rows or flush_interval seconds. The
+queue is flushed on shutdown; when it is full the rows are written
+synchronously so none are lost.
+"""
+import atexit
+import queue
+import threading
+import time
+from sqlalchemy import event
+from models import db
+
+
+class BatchWriter:
+    """write(rows, connection) is called with up to batch_size rows inside one transaction"""
+
+    def __init__(self, app, write, name, max_queue=10000, batch_size=200, flush_interval=0.05, put_timeout=0.01):
+        self.app = app
+        self.write = write
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopping = False
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "batches": 0,
+            "sync_fallbacks": 0,
+            "failed": 0,
+            "max_depth": 0,
+        }
+
+    # ================= PRODUCER =================
+    def submit(self, rows):
+        """Queue rows; never blocks longer than put_timeout per row"""
+        self._ensure_started()
+        overflow = []
+        for row in rows:
+            if self._stopping:
+                overflow.append(row)
+                continue
+            try:
+                self._queue.put(row, timeout=self.put_timeout)
+            except queue.Full:
+                overflow.append(row)
+        with self._lock:
+            self._stats["enqueued"] += len(rows) - len(overflow)
+            self._stats["max_depth"] = max(self._stats["max_depth"], self._queue.qsize())
+        if overflow:
+            # Backpressure: the queue is saturated, so the producer pays for its own write
+            self._write(overflow)
+            with self._lock:
+                self._stats["sync_fallbacks"] += len(overflow)
+
+    # ================= WORKER =================
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._thread.start()
+                    atexit.register(self.stop)
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._stopping:
+                    return
+                continue
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 and not self._stopping
+                                 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, rows):
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as connection:
+                    self.write(rows, connection)
+        except Exception:
+            self.app.logger.exception("%s failed to write %d rows", self.name, len(rows))
+            with self._lock:
+                self._stats["failed"] += len(rows)
+            return
+        with self._lock:
+            self._stats["written"] += len(rows)
+            self._stats["batches"] += 1
+
+    # ================= LIFECYCLE =================
+    def flush(self):
+        """Block until everything queued so far has been written"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def stop(self):
+        """Flush the queue and stop the worker (registered with atexit)"""
+        if self._thread is None or self._stopping:
+            return
+        self.flush()
+        self._stopping = True
+        self._thread.join()
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self._queue.qsize()
+        stats["queue_capacity"] = self._queue.maxsize
+        stats["running"] = self._thread is not None and self._thread.is_alive()
+        return stats
+
+
+# ================= TRANSACTION HAND-OFF =================
+def defer_until_commit(pending_key, rows):
+    """Collect rows in the current session; they reach the writer installed for pending_key on commit"""
+    db.session().info.setdefault(pending_key, []).extend(rows)
+
+
+def install_after_commit_handoff(app, extension, pending_key, writer):
+    """Register writer as app.extensions[extension] and submit each committed transaction's pending rows to it"""
+    app.extensions[extension] = writer
+
+    @event.listens_for(db.session, "after_commit")
+    def _hand_off(session):
+        rows = session.info.pop(pending_key, None)
+        if rows:
+            writer.submit(rows)
+
+    @event.listens_for(db.session, "after_soft_rollback")
+    def _discard(session, previous_transaction):
+        session.info.pop(pending_key, None)
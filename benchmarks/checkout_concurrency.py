@@ -0,0 +1,95 @@
+"""
+Checkout Concurrency Benchmark
+Fires parallel checkouts at a single user and checks that the balance is
+never overspent. Uses a throwaway SQLite file, not gaming_store.db.
+
+Usage: python benchmarks/checkout_concurrency.py --workers 16 --checkouts 200
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from common import build_app
+from models import db, User, Game, Order, OrderItem, Notification
+from cart_service import price_cart
+from checkout_service import place_order, InsufficientBalance
+
+
+def seed(app, balance, games_per_order):
+    """Create one user and enough games for a cart; returns (user_id, cart)"""
+    with app.app_context():
+        db.create_all()
+        user = User(username="bench", email="bench@example.com", password="x", balance=balance)
+        games = [Game(title=f"Bench Game {i}", category="Bench", price=Decimal("1.00"))
+                 for i in range(games_per_order)]
+        db.session.add(user)
+        db.session.add_all(games)
+        db.session.commit()
+        return user.id, {str(game.id): 1 for game in games}
+
+
+def run(workers, checkouts, games_per_order):
+    order_total = Decimal(games_per_order)
+    # Only half of the attempted checkouts can be afforded
+    balance = order_total * (checkouts // 2)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = build_app(os.path.join(tmp, "bench.db"))
+        user_id, cart = seed(app, balance, games_per_order)
+
+        def checkout_once(_):
+            with app.app_context():
+                priced = price_cart(cart)
+                started = time.perf_counter()
+                try:
+                    place_order(user_id, priced.items, priced.total_price)
+                    outcome = "placed"
+                except InsufficientBalance:
+                    outcome = "rejected"
+                except Exception:
+                    db.session.rollback()
+                    outcome = "failed"
+                return outcome, time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(checkout_once, range(checkouts)))
+        elapsed = time.perf_counter() - started
+
+        with app.app_context():
+            final_balance = Decimal(str(db.session.get(User, user_id).balance))
+            orders = Order.query.count()
+            items = OrderItem.query.count()
+            notifications = Notification.query.count()
+
+    placed = sum(1 for outcome, _ in results if outcome == "placed")
+    latencies = sorted(latency for _, latency in results)
+    expected_balance = balance - order_total * placed
+    return {
+        "workers": workers,
+        "checkouts": checkouts,
+        "games_per_order": games_per_order,
+        "placed": placed,
+        "rejected": sum(1 for outcome, _ in results if outcome == "rejected"),
+        "failed": sum(1 for outcome, _ in results if outcome == "failed"),
+        "elapsed_s": round(elapsed, 3),
+        "checkouts_per_s": round(checkouts / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+        "final_balance": str(final_balance),
+        "balance_consistent": final_balance == expected_balance and final_balance >= 0,
+        "rows_consistent": orders == placed and items == notifications == placed * games_per_order,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel checkout benchmark")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--checkouts", type=int, default=200)
+    parser.add_argument("--games-per-order", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(run(args.workers, args.checkouts, args.games_per_order), indent=2))
@@ -0,0 +1,54 @@
+"""
+Password Hashing Benchmark
+Measures login verifications per second (and per core) for the inline path
+and the process-pool executor of password_service.
+
+Usage: python benchmarks/password_hashing.py --logins 64 --method scrypt:32768:8:1
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+from password_service import PasswordService, DEFAULT_METHOD
+
+
+def measure(service, stored, logins, concurrency):
+    """Fire logins verifications from concurrency request threads"""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as requests:
+        results = list(requests.map(lambda _: service.verify(stored, "correct horse")[0], range(logins)))
+    elapsed = time.perf_counter() - started
+    assert all(results)
+    return elapsed
+
+
+def run(logins, method, workers, concurrency):
+    report = {"method": method, "logins": logins, "concurrency": concurrency, "cpu_count": os.cpu_count()}
+    for kind, pool_workers in (("inline", 1), ("process", workers)):
+        service = PasswordService(method=method, executor=kind, workers=pool_workers,
+                                  max_pending=concurrency, acquire_timeout=60)
+        stored = service.hash("correct horse")
+        service.verify(stored, "correct horse")  # warm the pool
+        elapsed = measure(service, stored, logins, concurrency)
+        service.shutdown()
+        cores = 1 if kind == "inline" else min(pool_workers, os.cpu_count() or 1)
+        report[kind] = {
+            "workers": pool_workers,
+            "elapsed_s": round(elapsed, 3),
+            "logins_per_s": round(logins / elapsed, 1),
+            "logins_per_s_per_core": round(logins / elapsed / cores, 1),
+        }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Password verification throughput")
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--method", default=DEFAULT_METHOD)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    print(json.dumps(run(args.logins, args.method, args.workers, args.concurrency), indent=2))
@@ -0,0 +1,117 @@
+"""
+SQLite Profile Benchmark
+Runs the same mixed read/write workload (catalog page + reviews reads,
+review insert + rating aggregate update writes) from several threads
+against a fresh database per database profile, and reports throughput,
+latency percentiles and lock errors, so the rollback-journal defaults
+("testing") can be compared with the WAL "production" profile.
+
+Usage: python benchmarks/sqlite_profiles.py --threads 8 --seconds 5 --write-ratio 0.2
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+from common import build_app, percentiles
+from sqlalchemy import update
+from sqlalchemy.exc import OperationalError
+from models import db, User, Game, Review
+from db_profiles import engine_options, install_sqlite_pragmas, sqlite_settings
+
+
+def seed(app, games, users):
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([Game(title=f"Profile Game {i}", category=f"Cat {i % 7}", price=Decimal("9.99"))
+                            for i in range(games)])
+        db.session.add_all([User(username=f"profile{i}", email=f"profile{i}@example.com", password="x")
+                            for i in range(users)])
+        db.session.commit()
+
+
+def read_op(game_ids):
+    Game.query.order_by(Game.date_added.desc(), Game.id.desc()).limit(24).all()
+    Review.query.filter_by(game_id=random.choice(game_ids)).order_by(Review.created_at.desc()).all()
+
+
+def write_op(game_ids, user_ids):
+    game_id = random.choice(game_ids)
+    rating = float(random.randint(1, 5))
+    db.session.add(Review(user_id=random.choice(user_ids), game_id=game_id, comment="benchmark", rating=rating))
+    db.session.execute(update(Game).where(Game.id == game_id)
+                       .values(rating_count=Game.rating_count + 1, rating_sum=Game.rating_sum + rating))
+    db.session.commit()
+
+
+def worker(app, deadline, write_ratio, game_ids, user_ids, results):
+    reads, writes, errors = [], [], 0
+    while time.perf_counter() < deadline:
+        is_write = random.random() < write_ratio
+        started = time.perf_counter()
+        with app.app_context():
+            try:
+                if is_write:
+                    write_op(game_ids, user_ids)
+                else:
+                    read_op(game_ids)
+            except OperationalError:
+                db.session.rollback()
+                errors += 1
+                continue
+        (writes if is_write else reads).append(time.perf_counter() - started)
+    results.append((reads, writes, errors))
+
+
+def run_profile(profile, threads, seconds, write_ratio, games, users):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        uri = f"sqlite:///{path}"
+        app = build_app(path, DB_PROFILE=profile, SQLALCHEMY_ENGINE_OPTIONS=engine_options(profile, uri))
+        install_sqlite_pragmas(app, db)
+        seed(app, games, users)
+        with app.app_context():
+            game_ids = [row.id for row in Game.query.all()]
+            user_ids = [row.id for row in User.query.all()]
+            settings = sqlite_settings(db.engine)
+
+        results = []
+        deadline = time.perf_counter() + seconds
+        pool = [threading.Thread(target=worker, args=(app, deadline, write_ratio, game_ids, user_ids, results))
+                for _ in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        with app.app_context():
+            db.engine.dispose()
+
+    reads = [sample for r, _, _ in results for sample in r]
+    writes = [sample for _, w, _ in results for sample in w]
+    return {
+        "pragmas": settings,
+        "reads_per_s": round(len(reads) / seconds, 1),
+        "writes_per_s": round(len(writes) / seconds, 1),
+        "lock_errors": sum(e for _, _, e in results),
+        "read_latency": percentiles(reads),
+        "write_latency": percentiles(writes),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--games", type=int, default=500)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--profiles", nargs="+", default=["testing", "production"])
+    args = parser.parse_args()
+    report = {"threads": args.threads, "seconds": args.seconds, "write_ratio": args.write_ratio}
+    for name in args.profiles:
+        report[name] = run_profile(name, args.threads, args.seconds, args.write_ratio, args.games, args.users)
+    print(json.dumps(report, indent=2))
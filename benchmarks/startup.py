@@ -0,0 +1,102 @@
+"""
+Startup Benchmark
+Cold-starts the app in fresh interpreters and reports import time,
+time-to-first-request and the slowest imports (python -X importtime), with
+the database initialized on import (AUTO_INIT_DB=1) and deferred to
+`flask init-db` (AUTO_INIT_DB=0). Runs against a scratch copy of the app so
+the real instance database is never touched.
+
+Usage: python benchmarks/startup.py --runs 5
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import time
+started = time.perf_counter()
+import tempCodeRunnerFile
+imported = time.perf_counter()
+from jinja2 import FileSystemLoader
+tempCodeRunnerFile.app.jinja_loader = FileSystemLoader(".")  # templates sit next to the app
+response = tempCodeRunnerFile.app.test_client().get("/browse")
+assert response.status_code == 200, response.status_code
+print(imported - started, time.perf_counter() - started)
+"""
+
+
+def copy_app(target):
+    for pattern in ("*.py", "*.html"):
+        for path in glob.glob(os.path.join(ROOT, pattern)):
+            shutil.copy(path, target)
+
+
+def child_env(auto_init):
+    env = dict(os.environ, AUTO_INIT_DB=auto_init, RESET_TOKEN_SWEEP_INTERVAL="0")
+    env.pop("QUERY_PLAN_AUDIT", None)
+    return env
+
+
+def cold_start(app_dir, auto_init):
+    """(import seconds, first response seconds, process wall seconds) of one fresh interpreter"""
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", CHILD], cwd=app_dir, env=child_env(auto_init),
+                            capture_output=True, text=True, check=True).stdout
+    wall = time.perf_counter() - started
+    imported, first_response = map(float, output.split())
+    return imported, first_response, wall
+
+
+def slowest_imports(app_dir, auto_init, top):
+    """The top modules by cumulative import time, in milliseconds"""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import tempCodeRunnerFile"],
+                            cwd=app_dir, env=child_env(auto_init), capture_output=True, text=True,
+                            check=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "cumulative" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        rows.append((int(cumulative), module.strip()))
+    rows.sort(reverse=True)
+    return [{"module": module, "cumulative_ms": round(us / 1000, 1)} for us, module in rows[:top]]
+
+
+def summarize(samples):
+    return {
+        "import_ms": round(statistics.median(s[0] for s in samples) * 1000, 1),
+        "first_request_ms": round(statistics.median(s[1] for s in samples) * 1000, 1),
+        "process_wall_ms": round(statistics.median(s[2] for s in samples) * 1000, 1),
+    }
+
+
+def run(runs, top):
+    report = {"runs": runs}
+    with tempfile.TemporaryDirectory() as tmp:
+        copy_app(tmp)
+        # Brand-new database: the first boot has to create and seed everything
+        report["auto_init_empty_db"] = summarize([cold_start(tmp, "1")])
+        subprocess.run([sys.executable, "-m", "flask", "--app", "tempCodeRunnerFile", "init-db"], cwd=tmp,
+                       env=child_env("0"), capture_output=True, check=True)
+        for label, auto_init in (("auto_init", "1"), ("deferred_init", "0")):
+            cold_start(tmp, auto_init)  # warm the OS page cache and __pycache__
+            report[label] = summarize([cold_start(tmp, auto_init) for _ in range(runs)])
+            report[label]["slowest_imports"] = slowest_imports(tmp, auto_init, top)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="slowest imports to list")
+    args = parser.parse_args()
+    print(json.dumps(run(args.runs, args.top), indent=2))
@@ -0,0 +1,328 @@
+"""
+Storefront Benchmark
+Seeds a synthetic store (users, games, orders, reviews, notifications) at
+a configurable scale into a throwaway SQLite file, then drives the real
+app through the hot paths - browse, search, game page, add to cart,
+checkout, library, notifications and admin orders - from several virtual
+clients, either in-process through the Flask test client or over HTTP
+against a local threaded WSGI server (--server). Prints throughput,
+p50/p95/p99 latency and SQL statements per request, overall and per step,
+as JSON; save it with --output and diff runs across commits.
+
+App settings come from the environment as usual, so a change can be
+measured with and without its switch, e.g. PAGE_CACHE=0.
+
+Usage: python benchmarks/storefront.py --users 2000 --games 500 --orders 10000 --clients 4 --iterations 25
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from datetime import datetime, timedelta
+from decimal import Decimal
+from http.cookies import SimpleCookie
+
+from common import percentiles
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORDS = ["Shadow", "Galaxy", "Legends", "Racer", "Kingdom", "Pixel", "Dragon", "Storm", "Arena", "Quest",
+         "Empire", "Neon", "Zombie", "Soccer", "Knight", "Rogue", "Frontier", "Tactics", "Drift", "Titan"]
+CATEGORIES = ["Action", "Adventure", "Battle Royale", "Indie", "Puzzle", "Racing", "RPG", "Sandbox", "Shooter",
+              "Simulation", "Sports", "Strategy"]
+IMAGES = ["assets/images/Pubg.jfif", "assets/images/call_of_duty.jfif", "assets/images/Roblox.jfif",
+          "assets/images/Miencraft.jfif", "assets/images/efootball.jfif", "assets/images/Fortnite.jpg"]
+STATUSES = ["Completed"] * 6 + ["Processing"] * 3 + ["Cancelled"]
+CHUNK = 5000
+
+
+# ================= APP + DATA =================
+def boot(db_path):
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["AUTO_INIT_DB"] = "0"  # the schema is seeded below, then init_database() builds derived tables
+    os.environ.setdefault("RESET_TOKEN_SWEEP_INTERVAL", "0")
+    sys.path.insert(0, ROOT)
+    from jinja2 import FileSystemLoader
+    import tempCodeRunnerFile
+    app = tempCodeRunnerFile.app
+    app.jinja_loader = FileSystemLoader(ROOT)
+    install_statement_header(app)
+    return app, tempCodeRunnerFile.init_database
+
+
+def install_statement_header(app):
+    """Report each request's SQL statement count in an X-Statement-Count response header"""
+    from flask import g, has_request_context
+    from sqlalchemy import event
+    from models import db
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context():
+            g.bench_statements = g.get("bench_statements", 0) + 1
+
+    def header(response):
+        response.headers["X-Statement-Count"] = str(g.get("bench_statements", 0))
+        return response
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, "before_cursor_execute", count)
+    # after_request functions run in reverse, so inserting first runs it last and counts the others' queries too
+    app.after_request_funcs.setdefault(None, []).insert(0, header)
+
+
+def _insert(model, rows):
+    from sqlalchemy import insert
+    from models import db
+    for start in range(0, len(rows), CHUNK):
+        db.session.execute(insert(model), rows[start:start + CHUNK])
+
+
+def seed(app, init_database, scale, rng):
+    """Bulk-load the synthetic dataset; returns (user_ids, game_ids)"""
+    from models import db, User, Game, Order, OrderItem, Review, Notification
+    from library_service import backfill_user_library
+    from rating_service import reconcile_ratings
+    now = datetime.utcnow()
+    ago = lambda days: now - timedelta(seconds=rng.randint(0, days * 86400))  # noqa: E731
+
+    with app.app_context():
+        db.create_all()
+        _insert(User, [{"id": i, "username": f"shopper{i}", "email": f"shopper{i}@example.com", "password": "!",
+                        "balance": Decimal("1000000.00"), "date_created": ago(730)}
+                       for i in range(1, scale["users"] + 1)])
+        prices = {}
+        games = []
+        for i in range(1, scale["games"] + 1):
+            prices[i] = Decimal(rng.choice(["0.00", "4.99", "9.99", "19.99", "29.99", "59.99"]))
+            games.append({"id": i, "title": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}",
+                          "category": rng.choice(CATEGORIES), "price": prices[i], "image": rng.choice(IMAGES),
+                          "rating": rng.uniform(3, 5), "downloads": rng.randint(0, 5000000), "date_added": ago(1000)})
+        _insert(Game, games)
+
+        orders, items = [], []
+        for order_id in range(1, scale["orders"] + 1):
+            picked = rng.sample(range(1, scale["games"] + 1), min(scale["games"], rng.randint(1, 3)))
+            orders.append({"id": order_id, "user_id": rng.randint(1, scale["users"]), "order_date": ago(365),
+                           "order_status": rng.choice(STATUSES), "total_price": sum(prices[g] for g in picked)})
+            items.extend({"order_id": order_id, "game_id": g, "quantity": 1, "price_at_purchase": prices[g]}
+                         for g in picked)
+        _insert(Order, orders)
+        _insert(OrderItem, items)
+        _insert(Review, [{"user_id": rng.randint(1, scale["users"]), "game_id": rng.randint(1, scale["games"]),
+                          "comment": f"{rng.choice(WORDS)} is great", "created_at": ago(365),
+                          "rating": float(rng.randint(1, 5)) if rng.random() < 0.8 else None}
+                         for _ in range(scale["reviews"])])
+        _insert(Notification, [{"user_id": rng.randint(1, scale["users"]), "message": "Your order has shipped",
+                                "is_read": rng.random() < 0.7, "created_at": ago(90)}
+                               for _ in range(scale["notifications"])])
+        db.session.commit()
+
+        init_database()  # default admin, search index, catalog version, order stats, notification counters
+        backfill_user_library()
+        reconcile_ratings()
+        db.session.commit()
+    return list(range(1, scale["users"] + 1)), list(range(1, scale["games"] + 1))
+
+
+def session_cookie(app, **values):
+    """Signed Flask session cookie, so virtual users skip login (and its rate limiter and password hashing)"""
+    return app.config["SESSION_COOKIE_NAME"], app.session_interface.get_signing_serializer(app).dumps(values)
+
+
+# ================= DRIVERS =================
+class TestClientDriver:
+    """In-process requests through the Flask test client"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def set_cookie(self, name, value):
+        self.client.set_cookie(name, value)
+
+    def request(self, method, path, data=None):
+        response = self.client.open(path, method=method, data=data)
+        response.close()
+        return response.status_code, int(response.headers.get("X-Statement-Count", 0))
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class HttpDriver:
+    """Real HTTP requests against a local WSGI server, with a per-client cookie jar"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.cookies = {}
+        self.opener = urllib.request.build_opener(_NoRedirect)
+
+    def set_cookie(self, name, value):
+        self.cookies[name] = value
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        if self.cookies:
+            req.add_header("Cookie", "; ".join(f"{k}={v}" for k, v in self.cookies.items()))
+        try:
+            response = self.opener.open(req)
+        except urllib.error.HTTPError as error:  # 3xx (redirects are not followed), 4xx, 5xx
+            response = error
+        with response:
+            response.read()
+            for header in response.headers.get_all("Set-Cookie") or []:
+                for name, morsel in SimpleCookie(header).items():
+                    self.cookies[name] = morsel.value
+            return response.status, int(response.headers.get("X-Statement-Count", 0))
+
+
+def start_server(app):
+    from werkzeug.serving import make_server
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+# ================= WORKLOAD =================
+def shopper_flow(app, driver, user_id, game_ids, rng):
+    """One visit: (step, method, path, data) requests, signed in as user_id"""
+    driver.set_cookie(*session_cookie(app, user_id=user_id, username=f"shopper{user_id}", is_admin=False))
+    game_id = rng.choice(game_ids)
+    return [
+        ("browse_anonymous", "GET", "/browse", None),
+        ("browse", "GET", "/browse", None),
+        ("search", "GET", f"/browse?q={rng.choice(WORDS).lower()}", None),
+        ("game_page", "GET", f"/game/{game_id}", None),
+        ("add_to_cart", "POST", f"/add_to_cart/{game_id}", {}),
+        ("cart", "GET", "/cart", None),
+        ("checkout", "POST", "/checkout", {}),
+        ("library", "GET", "/library", None),
+        ("notifications", "GET", "/notifications", None),
+    ]
+
+
+def run_client(app, make_driver, iterations, warmup, user_ids, game_ids, seed_value, samples):
+    rng = random.Random(seed_value)
+    shopper, anonymous, admin = make_driver(), make_driver(), make_driver()
+    admin.set_cookie(*session_cookie(app, admin_id=1, admin_name="Admin", is_admin=True))
+    for iteration in range(warmup + iterations):
+        requests = [(shopper, step) for step in shopper_flow(app, shopper, rng.choice(user_ids), game_ids, rng)]
+        # The first step browses without a session, like a visitor who has not signed in
+        requests[0] = (anonymous, requests[0][1])
+        requests.append((admin, ("admin_orders", "GET", "/admin/orders", None)))
+        for driver, (step, method, path, data) in requests:
+            started = time.perf_counter()
+            status, statements = driver.request(method, path, data)
+            elapsed = time.perf_counter() - started
+            if iteration >= warmup:
+                samples.append((step, elapsed, statements, status))
+
+
+def summarize(samples, elapsed):
+    def stats(rows):
+        return {
+            "requests": len(rows),
+            "errors": sum(1 for _, _, _, status in rows if status >= 500),
+            "statuses": dict(Counter(str(status) for _, _, _, status in rows)),
+            **percentiles([latency for _, latency, _, _ in rows]),
+            "statements_per_request": round(sum(count for _, _, count, _ in rows) / len(rows), 2),
+        }
+
+    steps = {}
+    for row in samples:
+        steps.setdefault(row[0], []).append(row)
+    return {
+        "total": {**stats(samples), "elapsed_s": round(elapsed, 3),
+                  "requests_per_s": round(len(samples) / elapsed, 1)},
+        "steps": {step: stats(rows) for step, rows in steps.items()},
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(args):
+    scale = {"users": args.users, "games": args.games, "orders": args.orders, "reviews": args.reviews,
+             "notifications": args.notifications}
+    with tempfile.TemporaryDirectory() as tmp:
+        app, init_database = boot(os.path.join(tmp, "storefront.db"))
+        started = time.perf_counter()
+        user_ids, game_ids = seed(app, init_database, scale, random.Random(args.seed))
+        seed_seconds = time.perf_counter() - started
+
+        server = None
+        if args.server:
+            server, base_url = start_server(app)
+            make_driver = lambda: HttpDriver(base_url)  # noqa: E731
+        else:
+            make_driver = lambda: TestClientDriver(app)  # noqa: E731
+
+        samples = []
+        threads = [threading.Thread(target=run_client, args=(app, make_driver, args.iterations, args.warmup,
+                                                             user_ids, game_ids, args.seed + n, samples))
+                   for n in range(args.clients)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        if server is not None:
+            server.shutdown()
+
+        from models import db
+        with app.app_context():
+            db.engine.dispose()
+
+    config_keys = ["DB_PROFILE", "CART_BACKEND", "CATALOG_CACHE", "PAGE_CACHE", "NAVBAR_CACHE_TTL",
+                   "NOTIFICATION_ASYNC", "ORDER_STATS_MATERIALIZED", "ACTIVITY_LOG_BUFFERED", "INSTRUMENTATION"]
+    return {
+        "commit": git_commit(),
+        "driver": "http" if args.server else "test_client",
+        "clients": args.clients,
+        "iterations": args.iterations,
+        "scale": scale,
+        "seed_s": round(seed_seconds, 2),
+        "config": {key: app.config.get(key, os.environ.get(key)) for key in config_keys},
+        **summarize(samples, elapsed),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--games", type=int, default=300)
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--reviews", type=int, default=5000)
+    parser.add_argument("--notifications", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=1, help="concurrent virtual clients (threads)")
+    parser.add_argument("--iterations", type=int, default=20, help="visits per client")
+    parser.add_argument("--warmup", type=int, default=2, help="unrecorded visits per client")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--server", action="store_true", help="drive a local WSGI server over HTTP")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+    report = main(args)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
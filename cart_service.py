@@ -0,0 +1,50 @@
+"""
+Cart Pricing Service
+Resolves a cart ({game_id: qty}) into priced lines from the catalog cache,
+with at most one query for the games it is missing
+"""
+from collections import namedtuple
+from decimal import Decimal
+from catalog_cache import get_games
+
+
+PricedCart = namedtuple("PricedCart", ["items", "total_price", "stale_ids"])
+
+
+def parse_cart_ids(cart):
+    """Split cart keys into valid integer IDs and keys that can never match a game"""
+    ids = {}
+    invalid = []
+    for key, qty in cart.items():
+        try:
+            ids[int(key)] = int(qty)
+        except (TypeError, ValueError):
+            invalid.append(key)
+    return ids, invalid
+
+
+def price_cart(cart):
+    """
+    Price every line of a cart from game snapshots (one IN (...) query on a cache miss).
+    Lines whose game no longer exists are skipped and reported in stale_ids
+    so the caller can drop them from the cart store.
+    """
+    quantities, stale_ids = parse_cart_ids(cart)
+    games = {}
+    if quantities:
+        games = get_games(quantities)
+
+    items = []
+    total_price = Decimal("0.00")
+    for key, qty in cart.items():
+        if key in stale_ids:
+            continue
+        game = games.get(int(key))
+        if game is None:
+            stale_ids.append(key)
+            continue
+        subtotal = Decimal(game.price or 0) * quantities[int(key)]
+        total_price += subtotal
+        items.append({"game": game, "quantity": quantities[int(key)], "subtotal": subtotal})
+
+    return PricedCart(items, total_price, stale_ids)
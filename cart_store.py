@@ -0,0 +1,242 @@
+"""
+Server-side Cart Store
+The session only carries a cart ID; cart lines live in a pluggable backend.
+Backends: in-process LRU ("memory"), the app database ("sqlite") and any
+Redis-compatible client ("redis").
+"""
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from models import db, CartLine
+from db_profiles import upsert_insert
+
+
+def new_cart_id():
+    return uuid.uuid4().hex
+
+
+class CartStore(ABC):
+    """Interface shared by all cart backends. Carts are {str(game_id): qty} dicts."""
+
+    @abstractmethod
+    def get(self, cart_id):
+        """The cart's lines; an empty dict for an unknown cart"""
+
+    @abstractmethod
+    def increment(self, cart_id, game_id, by=1):
+        """Add by to a line, creating the cart and the line as needed"""
+
+    @abstractmethod
+    def set_quantity(self, cart_id, game_id, quantity):
+        """Update the quantity of a line that is already in the cart"""
+
+    @abstractmethod
+    def remove(self, cart_id, *game_ids):
+        """Drop lines from the cart"""
+
+    @abstractmethod
+    def clear(self, cart_id):
+        """Drop the whole cart"""
+
+
+# ================= IN-PROCESS LRU =================
+class MemoryCartStore(CartStore):
+    """Per-process LRU of carts; only suitable for a single worker"""
+
+    def __init__(self, max_carts=10000):
+        self.max_carts = max_carts
+        self._carts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _touch(self, cart_id, create=False):
+        cart = self._carts.get(cart_id)
+        if cart is None:
+            if not create:
+                return None
+            cart = self._carts[cart_id] = {}
+            while len(self._carts) > self.max_carts:
+                self._carts.popitem(last=False)
+        self._carts.move_to_end(cart_id)
+        return cart
+
+    def get(self, cart_id):
+        with self._lock:
+            return dict(self._touch(cart_id) or {})
+
+    def increment(self, cart_id, game_id, by=1):
+        with self._lock:
+            cart = self._touch(cart_id, create=True)
+            cart[str(game_id)] = cart.get(str(game_id), 0) + by
+
+    def set_quantity(self, cart_id, game_id, quantity):
+        with self._lock:
+            cart = self._touch(cart_id)
+            if cart is not None and str(game_id) in cart:
+                cart[str(game_id)] = quantity
+
+    def remove(self, cart_id, *game_ids):
+        with self._lock:
+            cart = self._touch(cart_id)
+            for game_id in game_ids:
+                if cart is not None:
+                    cart.pop(str(game_id), None)
+
+    def clear(self, cart_id):
+        with self._lock:
+            self._carts.pop(cart_id, None)
+
+
+# ================= SQLITE TABLE =================
+class SqliteCartStore(CartStore):
+    """Cart lines stored one row per (cart_id, game_id) in the app database"""
+
+    def get(self, cart_id):
+        rows = db.session.query(CartLine.game_id, CartLine.quantity).filter_by(cart_id=cart_id).all()
+        return {str(game_id): quantity for game_id, quantity in rows}
+
+    def increment(self, cart_id, game_id, by=1):
+        stmt = upsert_insert(db, CartLine).values(
+            cart_id=cart_id, game_id=int(game_id), quantity=by, updated_at=datetime.utcnow()
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CartLine.cart_id, CartLine.game_id],
+            set_={"quantity": CartLine.quantity + stmt.excluded.quantity,
+                  "updated_at": stmt.excluded.updated_at},
+        )
+        db.session.execute(stmt)
+        db.session.commit()
+
+    def set_quantity(self, cart_id, game_id, quantity):
+        CartLine.query.filter_by(cart_id=cart_id, game_id=int(game_id)).update(
+            {"quantity": quantity, "updated_at": datetime.utcnow()}
+        )
+        db.session.commit()
+
+    def remove(self, cart_id, *game_ids):
+        if not game_ids:
+            return
+        CartLine.query.filter(
+            CartLine.cart_id == cart_id,
+            CartLine.game_id.in_([int(game_id) for game_id in game_ids]),
+        ).delete(synchronize_session=False)
+        db.session.commit()
+
+    def clear(self, cart_id):
+        CartLine.query.filter_by(cart_id=cart_id).delete(synchronize_session=False)
+        db.session.commit()
+
+    def purge_idle(self, max_age=timedelta(days=30)):
+        """Delete the carts nobody touched for max_age (by their newest line); returns rows removed"""
+        idle = (
+            db.session.query(CartLine.cart_id)
+            .group_by(CartLine.cart_id)
+            .having(func.max(CartLine.updated_at) < datetime.utcnow() - max_age)
+        )
+        removed = CartLine.query.filter(CartLine.cart_id.in_(idle.scalar_subquery())).delete(
+            synchronize_session=False
+        )
+        db.session.commit()
+        return removed
+
+
+# ================= REDIS =================
+class RedisCartStore(CartStore):
+    """
+    One Redis hash per cart (field = game ID, value = quantity).
+    Works with redis-py or any client exposing hgetall/hincrby/hset/hexists/hdel/delete/expire.
+    """
+
+    def __init__(self, client, ttl=timedelta(days=30), prefix="cart:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _key(self, cart_id):
+        return f"{self.prefix}{cart_id}"
+
+    def get(self, cart_id):
+        raw = self.client.hgetall(self._key(cart_id))
+        return {_text(field): int(qty) for field, qty in raw.items()}
+
+    def increment(self, cart_id, game_id, by=1):
+        key = self._key(cart_id)
+        self.client.hincrby(key, str(game_id), by)
+        self.client.expire(key, self.ttl)
+
+    def set_quantity(self, cart_id, game_id, quantity):
+        key = self._key(cart_id)
+        if self.client.hexists(key, str(game_id)):
+            self.client.hset(key, str(game_id), quantity)
+
+    def remove(self, cart_id, *game_ids):
+        if game_ids:
+            self.client.hdel(self._key(cart_id), *[str(game_id) for game_id in game_ids])
+
+    def clear(self, cart_id):
+        self.client.delete(self._key(cart_id))
+
+
+def _text(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class LocalRedis:
+    """In-process stand-in for the handful of Redis hash commands RedisCartStore uses"""
+
+    def __init__(self):
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def hgetall(self, key):
+        with self._lock:
+            return {field.encode(): str(value).encode() for field, value in self._hashes.get(key, {}).items()}
+
+    def hincrby(self, key, field, amount=1):
+        with self._lock:
+            fields = self._hashes.setdefault(key, {})
+            fields[field] = int(fields.get(field, 0)) + amount
+            return fields[field]
+
+    def hset(self, key, field, value):
+        with self._lock:
+            self._hashes.setdefault(key, {})[field] = value
+            return 1
+
+    def hexists(self, key, field):
+        with self._lock:
+            return field in self._hashes.get(key, {})
+
+    def hdel(self, key, *fields):
+        with self._lock:
+            existing = self._hashes.get(key, {})
+            return sum(1 for field in fields if existing.pop(field, None) is not None)
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(1 for key in keys if self._hashes.pop(key, None) is not None)
+
+    def expire(self, key, ttl):
+        # TTLs are not enforced by the stand-in
+        return key in self._hashes
+
+
+def create_cart_store(app):
+    """Build the cart backend selected by app.config['CART_BACKEND']"""
+    backend = app.config.get('CART_BACKEND', 'sqlite')
+    if backend == 'memory':
+        return MemoryCartStore(max_carts=app.config.get('CART_MEMORY_MAX_CARTS', 10000))
+    if backend == 'sqlite':
+        return SqliteCartStore()
+    if backend == 'redis':
+        redis_url = app.config.get('CART_REDIS_URL')
+        if not redis_url:
+            return RedisCartStore(LocalRedis())
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CART_BACKEND='redis' with CART_REDIS_URL requires the 'redis' package")
+        return RedisCartStore(redis.Redis.from_url(redis_url))
+    raise ValueError(f"Unknown CART_BACKEND: {backend}")
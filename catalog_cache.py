@@ -0,0 +1,219 @@
+"""
+Catalog Cache
+Read-through cache of immutable game snapshots, keyed by game ID and by
+browse page. A transaction that writes the catalog marks itself with
+bump_catalog_version(); once it commits, the catalog_version row is bumped
+in a short transaction of its own, and until then its reads bypass the
+cache so uncommitted data is never cached. Each worker reads the version
+once per request and ignores entries cached under an older one, so
+invalidation reaches every process. Entries also expire after a TTL, which
+bounds staleness for writes that bypass bump_catalog_version().
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from flask import current_app, g, has_request_context
+from sqlalchemy import event, select, update
+from models import db, Game, CatalogVersion
+from pagination import keyset_paginate
+
+
+SNAPSHOT_FIELDS = ("id", "title", "category", "price", "rating", "downloads", "image", "date_added",
+                   "rating_count", "rating_sum")
+
+
+class GameSnapshot(namedtuple("GameSnapshot", SNAPSHOT_FIELDS)):
+    """Read-only copy of a Game row, safe to share between requests and threads"""
+    __slots__ = ()
+
+    @classmethod
+    def of(cls, game):
+        return cls(*(getattr(game, field) for field in SNAPSHOT_FIELDS))
+
+    average_rating = Game.average_rating
+
+
+# ================= VERSION =================
+def ensure_catalog_version():
+    """Create the single catalog_version row if it is missing"""
+    if db.session.get(CatalogVersion, 1) is None:
+        db.session.add(CatalogVersion(id=1, version=0))
+        db.session.commit()
+
+
+PENDING_KEY = "catalog_changed"
+
+
+def bump_catalog_version():
+    """Invalidate every worker's cached catalog once the caller's transaction commits"""
+    db.session.info[PENDING_KEY] = True
+
+
+def _write_pending():
+    return db.session.info.get(PENDING_KEY, False)
+
+
+def install_version_hooks():
+    """Bump the version after each committed catalog write (one UPDATE per transaction)"""
+    if event.contains(db.session, "after_commit", _bump_after_commit):
+        return
+    event.listen(db.session, "after_commit", _bump_after_commit)
+    event.listen(db.session, "after_soft_rollback", _forget_bump)
+
+
+def _bump_after_commit(session):
+    if not session.info.pop(PENDING_KEY, False):
+        return
+    # The session's transaction is over; the hot row is only locked for this one statement
+    with db.engine.begin() as connection:
+        connection.execute(
+            update(CatalogVersion).where(CatalogVersion.id == 1).values(version=CatalogVersion.version + 1)
+        )
+    if has_request_context():
+        g.pop("catalog_version", None)
+
+
+def _forget_bump(session, previous_transaction):
+    session.info.pop(PENDING_KEY, None)
+
+
+def current_version():
+    """The catalog version, read at most once per request"""
+    if has_request_context() and "catalog_version" in g:
+        return g.catalog_version
+    version = db.session.scalar(select(CatalogVersion.version).where(CatalogVersion.id == 1)) or 0
+    if has_request_context():
+        g.catalog_version = version
+    return version
+
+
+# ================= CACHE =================
+class CatalogCache:
+    def __init__(self, ttl=300, max_entries=5000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (version, expires_at, value)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stale": 0}
+
+    def _lookup(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                cached_version, expires_at, value = entry
+                if cached_version == version and expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return True, value
+                del self._entries[key]
+                self.stats["stale"] += 1
+            self.stats["misses"] += 1
+        return False, None
+
+    def _store(self, key, version, value):
+        with self._lock:
+            self._entries[key] = (version, time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _version(self):
+        return current_version()
+
+    def get_or_load(self, key, loader):
+        if _write_pending():
+            return loader()
+        version = self._version()
+        found, value = self._lookup(key, version)
+        if not found:
+            value = loader()
+            self._store(key, version, value)
+        return value
+
+    def get_many(self, ids, loader):
+        """{id: value} for ids, loading every miss with one loader(missing_ids) call"""
+        if _write_pending():
+            return {game_id: value for game_id, value in loader(ids).items() if value is not None}
+        version = self._version()
+        found = {}
+        for game_id in ids:
+            hit, value = self._lookup(("game", game_id), version)
+            if hit:
+                found[game_id] = value
+        missing = [game_id for game_id in ids if game_id not in found]
+        if missing:
+            loaded = loader(missing)
+            for game_id in missing:
+                value = loaded.get(game_id)
+                self._store(("game", game_id), version, value)
+                found[game_id] = value
+        return {game_id: value for game_id, value in found.items() if value is not None}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 3) if lookups else None
+        return stats
+
+
+class NullCatalogCache(CatalogCache):
+    """CATALOG_CACHE disabled (or an app without a cache): every read goes to the database"""
+
+    def _version(self):
+        return None
+
+    def _lookup(self, key, version):
+        with self._lock:
+            self.stats["misses"] += 1
+        return False, None
+
+    def _store(self, key, version, value):
+        pass
+
+
+def create_catalog_cache(app):
+    """Build the cache from CATALOG_CACHE / CATALOG_CACHE_TTL / CATALOG_CACHE_SIZE"""
+    if not app.config.get('CATALOG_CACHE', True):
+        cache = NullCatalogCache()
+    else:
+        cache = CatalogCache(ttl=app.config.get('CATALOG_CACHE_TTL', 300),
+                             max_entries=app.config.get('CATALOG_CACHE_SIZE', 5000))
+    app.extensions["catalog_cache"] = cache
+    install_version_hooks()
+    return cache
+
+
+# ================= READS =================
+_uncached = NullCatalogCache()
+
+
+def _cache():
+    return current_app.extensions.get("catalog_cache", _uncached)
+
+
+def _load_games(ids):
+    return {game.id: GameSnapshot.of(game) for game in Game.query.filter(Game.id.in_(ids)).all()}
+
+
+def get_game(game_id):
+    """Snapshot of one game, or None"""
+    return _cache().get_many([game_id], _load_games).get(game_id)
+
+
+def get_games(ids):
+    """{id: snapshot} for the ids that exist"""
+    return _cache().get_many(list(dict.fromkeys(ids)), _load_games)
+
+
+def games_page(sort, allowed, cursor=None, page_size=None):
+    """A keyset page of the whole catalog (see pagination.keyset_paginate) with snapshot items"""
+    def load():
+        page = keyset_paginate(Game.query, sort, allowed, Game.id, cursor=cursor, page_size=page_size)
+        return page._replace(items=tuple(GameSnapshot.of(game) for game in page.items))
+    return _cache().get_or_load(("page", sort, cursor, page_size), load)
@@ -0,0 +1,85 @@
+"""
+Checkout Service
+Places an order in one atomic transaction: guarded balance decrement,
+bulk insert of order items and notifications, retry on lock conflicts
+"""
+import random
+import time
+from datetime import datetime
+from sqlalchemy import insert, update
+from sqlalchemy.exc import OperationalError
+from models import db, User, Order, OrderItem
+from order_stats import record_order_placed
+from library_service import grant_games
+from notification_service import notify_many
+
+
+MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 0.02  # seconds, doubled on every retry
+
+
+class InsufficientBalance(Exception):
+    """Raised when the user's balance cannot cover the order total"""
+
+
+def is_lock_conflict(error):
+    """True for transient lock errors (SQLite busy/locked, server DB serialization/deadlock)"""
+    message = str(getattr(error, "orig", error)).lower()
+    return any(marker in message for marker in ("locked", "busy", "deadlock", "could not serialize"))
+
+
+def _snapshot_lines(cart_items):
+    """Copy priced cart lines into plain tuples so retries do not touch expired ORM objects"""
+    return [
+        (item["game"].id, item["game"].title, item["game"].price, item["quantity"])
+        for item in cart_items
+    ]
+
+
+def _place_order_once(user_id, lines, total_price):
+    # The guarded UPDATE is the first write, so it takes the write lock up front
+    # and two concurrent checkouts can never both spend the same balance.
+    result = db.session.execute(
+        update(User)
+        .where(User.id == user_id, User.balance >= total_price)
+        .values(balance=User.balance - total_price)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        db.session.rollback()
+        raise InsufficientBalance()
+
+    order = Order(user_id=user_id, total_price=total_price)
+    db.session.add(order)
+    db.session.flush()
+    record_order_placed(order.order_status, total_price)
+
+    purchased_at = datetime.utcnow().strftime('%Y-%m-%d %H:%M')
+    if lines:
+        db.session.execute(insert(OrderItem), [
+            {"order_id": order.id, "game_id": game_id, "quantity": qty, "price_at_purchase": price}
+            for game_id, _title, price, qty in lines
+        ])
+        notify_many([
+            (user_id, f"You purchased {title} for ${price:.2f} on {purchased_at}")
+            for _game_id, title, price, _qty in lines
+        ])
+        grant_games(user_id, [game_id for game_id, _title, _price, _qty in lines], order.order_date)
+    db.session.commit()
+    return order.id
+
+
+def place_order(user_id, cart_items, total_price, max_attempts=MAX_ATTEMPTS):
+    """
+    Place an order for priced cart lines (see cart_service.price_cart).
+    Returns the new order ID; raises InsufficientBalance if the balance is too low.
+    """
+    lines = _snapshot_lines(cart_items)
+    for attempt in range(1, max_attempts + 1):
+        try:
+            return _place_order_once(user_id, lines, total_price)
+        except OperationalError as e:
+            db.session.rollback()
+            if attempt == max_attempts or not is_lock_conflict(e):
+                raise
+            time.sleep(RETRY_BASE_DELAY * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
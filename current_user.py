@@ -0,0 +1,107 @@
+"""
+Current User Loader
+Loads the logged-in user at most once per request, and keeps the few fields
+the page header needs (username, profile photo) in a small per-process
+cache so pages that only draw the navbar run no user query at all.
+edit_profile and admin_edit_user invalidate the cached entry; other workers
+pick the change up when their entry's TTL runs out.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from flask import current_app, g, session
+from sqlalchemy import select
+from models import db, User
+
+
+NavbarUser = namedtuple("NavbarUser", ["id", "username", "profile_photo"])
+
+
+class NavbarCache:
+    def __init__(self, ttl=60, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # user_id -> (expires_at, NavbarUser)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.stats["hits"] += 1
+                return entry[1]
+            self._entries.pop(user_id, None)
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, fields):
+        with self._lock:
+            self._entries[fields.id] = (time.monotonic() + self.ttl, fields)
+            self._entries.move_to_end(fields.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def metrics(self):
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries)}
+
+
+def create_navbar_cache(app):
+    """Build the cache from NAVBAR_CACHE_TTL (seconds, 0 disables it)"""
+    cache = NavbarCache(ttl=app.config.get('NAVBAR_CACHE_TTL', 60))
+    app.extensions["navbar_cache"] = cache
+    return cache
+
+
+def _cache():
+    cache = current_app.extensions.get("navbar_cache")
+    return cache if cache is not None and cache.ttl > 0 else None
+
+
+def current_user():
+    """The logged-in User, loaded once per request; None when logged out or deleted"""
+    user_id = session.get("user_id")
+    if not user_id:
+        return None
+    if "current_user" not in g:
+        g.current_user = db.session.get(User, user_id)
+        if g.current_user is not None and _cache() is not None:
+            _cache().put(NavbarUser(g.current_user.id, g.current_user.username, g.current_user.profile_photo))
+    return g.current_user
+
+
+def navbar_user():
+    """Header fields of the logged-in user, from the request, the cache or one narrow query"""
+    user_id = session.get("user_id")
+    if not user_id:
+        return None
+    if g.get("current_user") is not None:
+        user = g.current_user
+        return NavbarUser(user.id, user.username, user.profile_photo)
+    cache = _cache()
+    fields = cache.get(user_id) if cache is not None else None
+    if fields is None:
+        row = db.session.execute(
+            select(User.id, User.username, User.profile_photo).where(User.id == user_id)
+        ).first()
+        if row is None:
+            return None
+        fields = NavbarUser(*row)
+        if cache is not None:
+            cache.put(fields)
+    return fields
+
+
+def invalidate_navbar_user(user_id):
+    """Drop the cached header fields after the user's username or photo changed"""
+    cache = current_app.extensions.get("navbar_cache")
+    if cache is not None:
+        cache.invalidate(user_id)
+    if g.get("current_user") is not None and g.current_user.id == user_id:
+        g.pop("current_user")
@@ -0,0 +1,109 @@
+"""
+Database Profiles
+Per-environment engine settings: the SQLite pragmas applied to every new
+connection (WAL so readers never wait for a writer, synchronous=NORMAL,
+busy_timeout, mmap and page cache sizes) and the SQLALCHEMY_ENGINE_OPTIONS
+pool settings for server databases. The profile is picked by the
+create_app() config_name (DB_PROFILE for tempCodeRunnerFile). Also picks
+the INSERT ... ON CONFLICT construct of the database in use for upserts.
+"""
+from collections import namedtuple
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+
+
+DatabaseProfile = namedtuple("DatabaseProfile", ["sqlite_pragmas", "sqlite_options", "server_options"])
+
+PROFILES = {
+    "development": DatabaseProfile(
+        sqlite_pragmas={"journal_mode": "WAL", "synchronous": "NORMAL", "busy_timeout": 5000},
+        sqlite_options={},
+        server_options={"pool_pre_ping": True},
+    ),
+    # Throwaway databases: keep SQLite's defaults apart from waiting on locks
+    "testing": DatabaseProfile(
+        sqlite_pragmas={"busy_timeout": 5000},
+        sqlite_options={},
+        server_options={"pool_pre_ping": True},
+    ),
+    "production": DatabaseProfile(
+        sqlite_pragmas={
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 5000,
+            "mmap_size": 256 * 1024 * 1024,
+            "cache_size": -64 * 1024,  # KiB
+            "temp_store": "MEMORY",
+        },
+        sqlite_options={"pool_size": 10, "max_overflow": 20, "pool_timeout": 10},
+        server_options={"pool_size": 10, "max_overflow": 20, "pool_timeout": 10, "pool_recycle": 1800,
+                        "pool_pre_ping": True},
+    ),
+}
+
+
+def get_profile(name):
+    try:
+        return PROFILES[name or "development"]
+    except KeyError:
+        raise ValueError(f"Unknown database profile: {name}")
+
+
+def engine_options(name, uri):
+    """SQLALCHEMY_ENGINE_OPTIONS of the profile for a database URI"""
+    profile = get_profile(name)
+    if make_url(uri).get_backend_name() == "sqlite":
+        return dict(profile.sqlite_options)
+    return dict(profile.server_options)
+
+
+def _set_pragmas(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma, value in pragmas.items():
+                cursor.execute(f"PRAGMA {pragma} = {value}")
+        finally:
+            cursor.close()
+    return on_connect
+
+
+def apply_database_profile(app, name):
+    """
+    Merge the profile's engine options under SQLALCHEMY_ENGINE_OPTIONS (explicit
+    settings win); call before db.init_app(app)
+    """
+    options = engine_options(name, app.config['SQLALCHEMY_DATABASE_URI'])
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    app.config['DB_PROFILE'] = name or "development"
+
+
+def install_sqlite_pragmas(app, db):
+    """Apply the profile's pragmas on every new SQLite connection of every bind; call after db.init_app(app)"""
+    pragmas = get_profile(app.config.get('DB_PROFILE')).sqlite_pragmas
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == "sqlite" and pragmas:
+                event.listen(engine, "connect", _set_pragmas(pragmas))
+
+
+def sqlite_settings(engine):
+    """Current values of the profile pragmas on one connection (for checks and benchmarks)"""
+    names = ("journal_mode", "synchronous", "busy_timeout", "mmap_size", "cache_size", "temp_store")
+    with engine.connect() as connection:
+        return {name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in names}
+
+
+def upsert_insert(db, model):
+    """
+    insert(model) supporting on_conflict_do_update / on_conflict_do_nothing and
+    .excluded on the primary database: SQLite or PostgreSQL
+    """
+    dialect = db.engine.dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    raise NotImplementedError(f"Upserts are not supported on {dialect}")
@@ -0,0 +1,108 @@
+"""
+Read/Write Splitting
+Routes plain SELECTs of views marked @use_replica to one of the read
+replica binds (replica_0, replica_1, ...) and everything else - writes,
+flushes, SELECT ... FOR UPDATE, raw SQL - to the primary. After a request
+commits a write, the user's session is pinned to the primary for
+REPLICA_STICKY_SECONDS so they always read their own writes even if the
+replicas lag behind.
+"""
+import random
+import time
+from functools import wraps
+from flask import current_app, has_request_context, session as flask_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql import Select
+
+
+READ_KEY = "read_replica"
+WROTE_KEY = "wrote"
+STICKY_KEY = "primary_until"
+
+
+def replica_keys(engines):
+    return sorted(key for key in engines if key and key.startswith("replica_"))
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that sends replica-eligible reads to a replica bind"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get(READ_KEY) and not self._flushing and _is_plain_select(clause):
+            keys = replica_keys(self._db.engines)
+            if keys:
+                return self._db.engines[random.choice(keys)]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _is_plain_select(clause):
+    return isinstance(clause, Select) and clause._for_update_arg is None
+
+
+def configure_replicas(app, urls):
+    """Register replica URLs as the replica_N binds; call before db.init_app(app)"""
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    for index, url in enumerate(urls):
+        binds[f"replica_{index}"] = url
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+
+def install_read_your_writes(app, db):
+    """Make replica connections read-only and pin a user to the primary after their writes"""
+    with app.app_context():
+        for key in replica_keys(db.engines):
+            engine = db.engines[key]
+            if engine.dialect.name == "sqlite":
+                event.listen(engine, "connect", _sqlite_query_only)
+
+    @event.listens_for(db.session, "after_flush")
+    def _flushed(session, flush_context):
+        session.info[WROTE_KEY] = True
+
+    @event.listens_for(db.session, "do_orm_execute")
+    def _executed(orm_execute_state):
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            orm_execute_state.session.info[WROTE_KEY] = True
+
+    @event.listens_for(db.session, "after_commit")
+    def _pin(session):
+        if session.info.pop(WROTE_KEY, False) and has_request_context():
+            flask_session[STICKY_KEY] = time.time() + current_app.config.get('REPLICA_STICKY_SECONDS', 5)
+
+    @event.listens_for(db.session, "after_soft_rollback")
+    def _forget(session, previous_transaction):
+        session.info.pop(WROTE_KEY, None)
+
+
+def _sqlite_query_only(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA query_only = 1")
+    cursor.close()
+
+
+def pinned_to_primary():
+    return flask_session.get(STICKY_KEY, 0) > time.time()
+
+
+def reporting_engine(db):
+    """Engine for long read-only reports run outside the ORM session: a replica unless pinned to the primary"""
+    keys = replica_keys(db.engines)
+    if keys and not pinned_to_primary():
+        return db.engines[random.choice(keys)]
+    return db.engine
+
+
+def use_replica(view):
+    """Serve the view's reads from a replica unless the user wrote recently"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        db = current_app.extensions["sqlalchemy"]
+        if pinned_to_primary():
+            return view(*args, **kwargs)
+        db.session.info[READ_KEY] = True
+        try:
+            return view(*args, **kwargs)
+        finally:
+            db.session.info.pop(READ_KEY, None)
+    return wrapper
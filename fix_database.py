@@ -10,17 +10,7 @@ from app import app
 from models import db, User, Admin
 from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy import func
-
-def is_hashed(password):
-    """Check if password is already hashed"""
-    if not password:
-        return False
-    # Werkzeug hashes start with specific prefixes
-    return (password.startswith("$2b$") or 
-            password.startswith("$2a$") or 
-            password.startswith("$pbkdf2:") or
-            password.startswith("scrypt:") or
-            password.startswith("$argon2"))
+from password_service import is_hashed
 
 def fix_database():
     """Fix database issues"""
@@ -46,9 +36,8 @@ def fix_database():
             # Check if password needs hashing
             if not is_hashed(user.password):
                 print(f"  WARNING: User {user.id} ({user.email}) has plain text password!")
-                print(f"    Password will be hashed on next login, or you can set a new password.")
-                # Don't hash it now because we don't know the original password
-                # It will be hashed automatically on next successful login
+                print(f"    Run migrate_hash_plaintext_passwords.py to hash it; it cannot be used to log in until then.")
+                # Logins only accept hashes; migrate_hash_plaintext_passwords.py hashes it in place
             
             if changed:
                 users_fixed += 1
@@ -70,7 +59,7 @@ def fix_database():
             # Check if password needs hashing
             if not is_hashed(admin.password):
                 print(f"  WARNING: Admin {admin.id} ({admin.email}) has plain text password!")
-                print(f"    Password will be hashed on next login, or you can set a new password.")
+                print(f"    Run migrate_hash_plaintext_passwords.py to hash it; it cannot be used to log in until then.")
             
             if changed:
                 admins_fixed += 1
@@ -0,0 +1,171 @@
+"""
+Request Instrumentation
+Opt-in per-endpoint metrics: wall time, SQL statement count and time
+(before/after_cursor_execute on every bind), template render time and
+response size, served as Prometheus text on /metrics. A sampled fraction
+of requests can also be run under cProfile and dumped as .prof files.
+"""
+import cProfile
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from flask import g, request, has_request_context, before_render_template, template_rendered
+from sqlalchemy import event
+
+
+# Upper bounds (seconds) of the request duration histogram
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _new_stats():
+    return {"requests": 0, "seconds": 0.0, "db_statements": 0, "db_seconds": 0.0, "template_seconds": 0.0,
+            "response_bytes": 0, "buckets": [0] * len(BUCKETS)}
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Instrumentation:
+    def __init__(self, app=None, db=None, profile_sample_rate=0.0, profile_dir=None):
+        self.profile_sample_rate = profile_sample_rate
+        self.profile_dir = profile_dir
+        self._lock = threading.Lock()
+        self._endpoints = defaultdict(_new_stats)  # endpoint -> stats
+        self._statuses = defaultdict(int)  # (endpoint, method, status) -> requests
+        self.profiles_written = 0
+        if app is not None:
+            self.init_app(app, db)
+
+    # ================= HOOKS =================
+    def init_app(self, app, db):
+        app.before_request(self._start)
+        app.after_request(self._capture_response)
+        app.teardown_request(self._finish)
+        before_render_template.connect(self._template_started, app)
+        template_rendered.connect(self._template_finished, app)
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, "before_cursor_execute", self._statement_started)
+                event.listen(engine, "after_cursor_execute", self._statement_finished)
+        app.add_url_rule("/metrics", "metrics", self.metrics_view)
+        app.extensions["instrumentation"] = self
+
+    def _start(self):
+        g._instr = {"started": time.perf_counter(), "db_statements": 0, "db_seconds": 0.0,
+                    "template_seconds": 0.0, "template_stack": [], "status": 500, "bytes": 0, "profiler": None}
+        if self.profile_sample_rate and random.random() < self.profile_sample_rate:
+            g._instr["profiler"] = cProfile.Profile()
+            g._instr["profiler"].enable()
+
+    def _statement_started(self, conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and "_instr" in g:
+            conn.info.setdefault("instr_started", []).append(time.perf_counter())
+
+    def _statement_finished(self, conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and "_instr" in g and conn.info.get("instr_started"):
+            g._instr["db_statements"] += 1
+            g._instr["db_seconds"] += time.perf_counter() - conn.info["instr_started"].pop()
+
+    def _template_started(self, sender, template, context, **extra):
+        if "_instr" in g:
+            g._instr["template_stack"].append(time.perf_counter())
+
+    def _template_finished(self, sender, template, context, **extra):
+        if "_instr" in g and g._instr["template_stack"]:
+            started = g._instr["template_stack"].pop()
+            if not g._instr["template_stack"]:  # count nested renders (fragments) once
+                g._instr["template_seconds"] += time.perf_counter() - started
+
+    def _capture_response(self, response):
+        if "_instr" in g:
+            g._instr["status"] = response.status_code
+            if not response.is_streamed:
+                g._instr["bytes"] = response.calculate_content_length() or 0
+        return response
+
+    def _finish(self, exc):
+        measured = g.pop("_instr", None)
+        if measured is None:
+            return
+        elapsed = time.perf_counter() - measured["started"]
+        if measured["profiler"] is not None:
+            measured["profiler"].disable()
+            self._dump_profile(measured["profiler"], elapsed)
+        endpoint = request.endpoint or "unmatched"
+        with self._lock:
+            stats = self._endpoints[endpoint]
+            stats["requests"] += 1
+            stats["seconds"] += elapsed
+            stats["db_statements"] += measured["db_statements"]
+            stats["db_seconds"] += measured["db_seconds"]
+            stats["template_seconds"] += measured["template_seconds"]
+            stats["response_bytes"] += measured["bytes"]
+            for index, bound in enumerate(BUCKETS):
+                if elapsed <= bound:
+                    stats["buckets"][index] += 1
+            self._statuses[(endpoint, request.method, measured["status"])] += 1
+
+    def _dump_profile(self, profiler, elapsed):
+        directory = self.profile_dir or "profiles"
+        os.makedirs(directory, exist_ok=True)
+        name = f"{request.endpoint or 'unmatched'}-{int(time.time() * 1000)}-{int(elapsed * 1000)}ms.prof"
+        profiler.dump_stats(os.path.join(directory, name))
+        with self._lock:
+            self.profiles_written += 1
+
+    # ================= EXPOSITION =================
+    def snapshot(self):
+        """{endpoint: stats} copy of the current counters"""
+        with self._lock:
+            return {endpoint: {**stats, "buckets": list(stats["buckets"])}
+                    for endpoint, stats in self._endpoints.items()}
+
+    def prometheus_text(self):
+        endpoints = self.snapshot()
+        with self._lock:
+            statuses = dict(self._statuses)
+        lines = [
+            "# HELP app_requests_total Requests handled, by endpoint, method and status.",
+            "# TYPE app_requests_total counter",
+        ]
+        for (endpoint, method, status), count in sorted(statuses.items()):
+            lines.append(f'app_requests_total{{endpoint="{_label(endpoint)}",method="{method}",status="{status}"}} {count}')
+
+        lines += ["# HELP app_request_duration_seconds Request wall time.",
+                  "# TYPE app_request_duration_seconds histogram"]
+        for endpoint, stats in sorted(endpoints.items()):
+            label = _label(endpoint)
+            for bound, count in zip(BUCKETS, stats["buckets"]):
+                lines.append(f'app_request_duration_seconds_bucket{{endpoint="{label}",le="{bound}"}} {count}')
+            lines.append(f'app_request_duration_seconds_bucket{{endpoint="{label}",le="+Inf"}} {stats["requests"]}')
+            lines.append(f'app_request_duration_seconds_sum{{endpoint="{label}"}} {stats["seconds"]:.6f}')
+            lines.append(f'app_request_duration_seconds_count{{endpoint="{label}"}} {stats["requests"]}')
+
+        totals = (
+            ("app_db_statements_total", "counter", "SQL statements executed.", "db_statements", "{}"),
+            ("app_db_duration_seconds_total", "counter", "Time spent executing SQL.", "db_seconds", "{:.6f}"),
+            ("app_template_render_seconds_total", "counter", "Time spent rendering templates.", "template_seconds",
+             "{:.6f}"),
+            ("app_response_bytes_total", "counter", "Response body bytes (streamed bodies excluded).",
+             "response_bytes", "{}"),
+        )
+        for name, kind, help_text, key, fmt in totals:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for endpoint, stats in sorted(endpoints.items()):
+                lines.append(f'{name}{{endpoint="{_label(endpoint)}"}} {fmt.format(stats[key])}')
+        return "\n".join(lines) + "\n"
+
+    def metrics_view(self):
+        return self.prometheus_text(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+
+def create_instrumentation(app, db):
+    """Install instrumentation when INSTRUMENTATION is set; returns None otherwise"""
+    if not app.config.get('INSTRUMENTATION'):
+        return None
+    profile_dir = app.config.get('PROFILE_DIR') or os.path.join(app.instance_path, "profiles")
+    return Instrumentation(app, db, profile_sample_rate=app.config.get('PROFILE_SAMPLE_RATE', 0.0),
+                           profile_dir=profile_dir)
@@ -0,0 +1,121 @@
+"""
+Library Service
+Owned games live in the denormalized user_library table, written in the
+checkout transaction and revoked on cancellation, so the library page,
+"owned" badges and ownership checks are single indexed lookups.
+"""
+from datetime import datetime
+from sqlalchemy import func, exists, and_
+from sqlalchemy.orm import contains_eager
+from models import db, Game, Order, OrderItem, UserLibrary
+from db_profiles import upsert_insert
+
+
+OWNED_STATUSES = ("Completed", "Processing")
+
+# {sort name: ORDER BY clauses}; newest acquisition first breaks ties
+LIBRARY_SORTS = {
+    "date": (UserLibrary.acquired_at.desc(),),
+    "title": (func.lower(Game.title).asc(), UserLibrary.acquired_at.desc()),
+    "category": (func.coalesce(Game.category, "").asc(), UserLibrary.acquired_at.desc()),
+}
+SORT_ALIASES = {"genre": "category"}
+
+
+def resolve_library_sort(sort):
+    sort = SORT_ALIASES.get(sort, sort)
+    return sort if sort in LIBRARY_SORTS else "date"
+
+
+# ================= READS =================
+def library_query(user_id, sort="date"):
+    """UserLibrary rows for the user with their game eagerly joined"""
+    return (
+        db.session.query(UserLibrary)
+        .join(UserLibrary.game)
+        .options(contains_eager(UserLibrary.game))
+        .filter(UserLibrary.user_id == user_id)
+        .order_by(*LIBRARY_SORTS[resolve_library_sort(sort)], UserLibrary.game_id.desc())
+    )
+
+
+def purchased_games(user_id, sort="date"):
+    """Library rows in the shape library.html expects"""
+    return [
+        {
+            "title": entry.game.title,
+            "category": entry.game.category,
+            "date_acquired": entry.acquired_at,
+            "game": entry.game,
+        }
+        for entry in library_query(user_id, sort)
+    ]
+
+
+def owned_game_ids(user_id, game_ids):
+    """Subset of game_ids the user owns, in one query"""
+    if not user_id or not game_ids:
+        return set()
+    rows = db.session.query(UserLibrary.game_id).filter(
+        UserLibrary.user_id == user_id, UserLibrary.game_id.in_(list(game_ids))
+    )
+    return {game_id for (game_id,) in rows}
+
+
+# ================= WRITES =================
+def grant_games(user_id, game_ids, acquired_at=None):
+    """Add games to a user's library; runs in the caller's transaction. Earlier acquisitions win."""
+    game_ids = set(game_ids)
+    if not game_ids:
+        return
+    acquired_at = acquired_at or datetime.utcnow()
+    stmt = upsert_insert(db, UserLibrary).values([
+        {"user_id": user_id, "game_id": game_id, "acquired_at": acquired_at} for game_id in game_ids
+    ])
+    db.session.execute(stmt.on_conflict_do_nothing(index_elements=[UserLibrary.user_id, UserLibrary.game_id]))
+
+
+def revoke_order(order):
+    """
+    Remove the games of a cancelled order from the owner's library, unless another
+    owned order still contains them; runs in the caller's transaction
+    """
+    game_ids = {item.game_id for item in order.items}
+    if not game_ids:
+        return
+    still_owned = exists().where(and_(
+        OrderItem.order_id == Order.id,
+        OrderItem.game_id == UserLibrary.game_id,
+        Order.user_id == order.user_id,
+        Order.id != order.id,
+        Order.order_status.in_(OWNED_STATUSES),
+    ))
+    UserLibrary.query.filter(
+        UserLibrary.user_id == order.user_id,
+        UserLibrary.game_id.in_(game_ids),
+        ~still_owned,
+    ).delete(synchronize_session=False)
+
+
+def backfill_user_library():
+    """Rebuild user_library from owned orders; returns the number of rows written"""
+    UserLibrary.query.delete()
+    rows = (
+        db.session.query(Order.user_id, OrderItem.game_id, func.min(Order.order_date))
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .filter(Order.order_status.in_(OWNED_STATUSES))
+        .group_by(Order.user_id, OrderItem.game_id)
+        .all()
+    )
+    db.session.bulk_insert_mappings(UserLibrary, [
+        {"user_id": user_id, "game_id": game_id, "acquired_at": acquired_at or datetime.utcnow()}
+        for user_id, game_id, acquired_at in rows
+    ])
+    db.session.commit()
+    return len(rows)
+
+
+def ensure_user_library():
+    """Fill user_library on the first start of an upgraded database that already has owned orders"""
+    if not UserLibrary.query.first() and Order.query.filter(Order.order_status.in_(OWNED_STATUSES)).first():
+        backfill_user_library()
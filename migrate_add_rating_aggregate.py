@@ -0,0 +1,51 @@
+"""
+Migration script to add rating_count / rating_sum columns to games table
+and fill them from existing reviews. Run this script once to update your database schema
+"""
+import sqlite3
+import os
+import sys
+
+# Path to the database
+db_path = os.path.join('instance', 'gaming_store.db')
+
+if not os.path.exists(db_path):
+    print(f"Database not found at {db_path}")
+    print("The database will be created when you run app.py")
+    sys.exit(1)
+
+try:
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    cursor.execute("PRAGMA table_info(games)")
+    columns = [column[1] for column in cursor.fetchall()]
+
+    for name, ddl in (("rating_count", "INTEGER NOT NULL DEFAULT 0"),
+                      ("rating_sum", "FLOAT NOT NULL DEFAULT 0")):
+        if name in columns:
+            print(f"✓ Column '{name}' already exists in games table.")
+        else:
+            print(f"Adding '{name}' column to games table...")
+            cursor.execute(f"ALTER TABLE games ADD COLUMN {name} {ddl}")
+
+    # Backfill from reviews (same result as rating_service.reconcile_ratings)
+    cursor.execute("""
+        UPDATE games SET
+            rating_count = (SELECT COUNT(rating) FROM reviews WHERE reviews.game_id = games.id),
+            rating_sum = (SELECT COALESCE(SUM(rating), 0) FROM reviews WHERE reviews.game_id = games.id)
+    """)
+    conn.commit()
+    print(f"✓ Rating aggregates filled for {cursor.rowcount} games")
+
+    conn.close()
+    print("\n✓ Migration completed successfully!")
+
+except sqlite3.Error as e:
+    print(f"✗ Database error: {e}")
+    sys.exit(1)
+except Exception as e:
+    print(f"✗ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
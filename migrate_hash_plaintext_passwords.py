@@ -0,0 +1,50 @@
+"""
+Migration script to hash legacy plain-text passwords in the users and admins tables.
+Logins only accept Werkzeug hashes, so run this script once before upgrading if
+fix_database.py reports any PLAIN TEXT passwords
+"""
+import sqlite3
+import os
+import sys
+from werkzeug.security import generate_password_hash
+from password_service import DEFAULT_METHOD, is_hashed, hash_method
+
+# Path to the database
+db_path = os.path.join('instance', 'gaming_store.db')
+
+if not os.path.exists(db_path):
+    print(f"Database not found at {db_path}")
+    print("The database will be created when you run app.py")
+    sys.exit(1)
+
+try:
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    for table in ("users", "admins"):
+        cursor.execute(f"SELECT id, email, password FROM {table}")
+        hashed = 0
+        for row_id, email, password in cursor.fetchall():
+            if not password:
+                continue
+            if not is_hashed(password):
+                cursor.execute(f"UPDATE {table} SET password = ? WHERE id = ?",
+                               (generate_password_hash(password, DEFAULT_METHOD), row_id))
+                hashed += 1
+            elif hash_method(password) is None:
+                # A hash in a format Werkzeug cannot verify; the account needs a password reset
+                print(f"  WARNING: {table} {row_id} ({email}) has an unsupported password hash; reset it")
+        print(f"✓ Hashed {hashed} plain-text passwords in {table}")
+
+    conn.commit()
+    conn.close()
+    print("\n✓ Migration completed successfully!")
+
+except sqlite3.Error as e:
+    print(f"✗ Database error: {e}")
+    sys.exit(1)
+except Exception as e:
+    print(f"✗ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
@@ -1,8 +1,9 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 from decimal import Decimal
+from db_routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 # -------------------------
 # USERS
@@ -14,7 +15,7 @@ class User(db.Model):
     email = db.Column(db.String(255), unique=True, nullable=False)
     password = db.Column(db.String(255), nullable=False)
     account_status = db.Column(db.String(20), default="Active")
-    date_created = db.Column(db.DateTime, default=datetime.utcnow)
+    date_created = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     balance = db.Column(db.Numeric(10, 2), default=Decimal("100.00"))
     profile_photo = db.Column(db.String(255), nullable=True)  # Path to profile photo
 
@@ -43,22 +44,41 @@ class Game(db.Model):
     title = db.Column(db.String(255), nullable=False)
     category = db.Column(db.String(100))
     price = db.Column(db.Numeric(10, 2))
-    rating = db.Column(db.Float, default=0.0)
+    rating = db.Column(db.Float, default=0.0)  # Seed/admin rating, shown until reviews carry ratings
     downloads = db.Column(db.Integer, default=0)
     image = db.Column(db.String(255))
-    date_added = db.Column(db.DateTime, default=datetime.utcnow)
+    date_added = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")  # Reviews with a rating
+    rating_sum = db.Column(db.Float, nullable=False, default=0.0, server_default="0")
 
     reviews = db.relationship("Review", backref="game", cascade="all, delete-orphan", lazy=True)
 
+    @property
+    def average_rating(self):
+        """Live average of review ratings, falling back to the seed rating"""
+        if self.rating_count:
+            return round(self.rating_sum / self.rating_count, 1)
+        return self.rating
+
+
+# Bumped on every catalog write; workers compare it to drop stale cached games (see catalog_cache.py)
+class CatalogVersion(db.Model):
+    __tablename__ = "catalog_version"
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
 
 # -------------------------
 # ORDERS
 # -------------------------
 class Order(db.Model):
     __tablename__ = "orders"
+    __table_args__ = (
+        db.Index("ix_orders_user_status_date", "user_id", "order_status", "order_date"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    order_date = db.Column(db.DateTime, default=datetime.utcnow)
+    order_date = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     total_price = db.Column(db.Numeric(10, 2))
     order_status = db.Column(db.String(20), default="Processing")
 
@@ -68,7 +88,7 @@ class Order(db.Model):
 class OrderItem(db.Model):
     __tablename__ = "order_items"
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=False, index=True)
     game_id = db.Column(db.Integer, db.ForeignKey("games.id"), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
     price_at_purchase = db.Column(db.Numeric(10, 2))
@@ -76,6 +96,37 @@ class OrderItem(db.Model):
     game = db.relationship("Game")
 
 
+# Materialized per-status order count and revenue (see order_stats.py)
+class OrderStatusStats(db.Model):
+    __tablename__ = "order_status_stats"
+    order_status = db.Column(db.String(20), primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(12, 2), nullable=False, default=Decimal("0.00"))
+
+
+# -------------------------
+# USER LIBRARY (owned games, maintained at checkout)
+# -------------------------
+class UserLibrary(db.Model):
+    __tablename__ = "user_library"
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    game_id = db.Column(db.Integer, db.ForeignKey("games.id"), primary_key=True)
+    acquired_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    game = db.relationship("Game")
+
+
+# -------------------------
+# CARTS (server-side cart store)
+# -------------------------
+class CartLine(db.Model):
+    __tablename__ = "cart_lines"
+    cart_id = db.Column(db.String(32), primary_key=True)
+    game_id = db.Column(db.Integer, primary_key=True)
+    quantity = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 # -------------------------
 # ACTIVITY LOGS
 # -------------------------
@@ -87,7 +138,19 @@ class ActivityLog(db.Model):
     target_type = db.Column(db.String(50))
     target_id = db.Column(db.Integer)
     details = db.Column(db.Text)
-    date = db.Column(db.DateTime, default=datetime.utcnow)
+    date = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+
+class ActivityLogArchive(db.Model):
+    """Activity log rows rotated out of activity_logs (see activity_log.rotate_activity_logs)"""
+    __tablename__ = "activity_logs_archive"
+    id = db.Column(db.Integer, primary_key=True)
+    admin_id = db.Column(db.Integer)
+    action = db.Column(db.String(255))
+    target_type = db.Column(db.String(50))
+    target_id = db.Column(db.Integer)
+    details = db.Column(db.Text)
+    date = db.Column(db.DateTime, index=True)
 
 
 # -------------------------
@@ -95,6 +158,10 @@ class ActivityLog(db.Model):
 # -------------------------
 class PasswordResetToken(db.Model):
     __tablename__ = "password_reset_tokens"
+    __table_args__ = (
+        db.Index("ix_password_reset_tokens_email_used_expires", "email", "used", "expires_at"),
+        db.Index("ix_password_reset_tokens_expires", "expires_at"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(255), nullable=False)
     token = db.Column(db.String(6), nullable=False)  # 6-digit code
@@ -108,6 +175,10 @@ class PasswordResetToken(db.Model):
 # -------------------------
 class Review(db.Model):
     __tablename__ = "reviews"
+    __table_args__ = (
+        db.Index("ix_reviews_game_user", "game_id", "user_id"),
+        db.Index("ix_reviews_game_created", "game_id", "created_at"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     game_id = db.Column(db.Integer, db.ForeignKey("games.id"), nullable=False)
@@ -122,8 +193,19 @@ class Review(db.Model):
 # -------------------------
 class Notification(db.Model):
     __tablename__ = "notifications"
+    __table_args__ = (
+        db.Index("ix_notifications_user_read_created", "user_id", "is_read", "created_at"),
+        db.Index("ix_notifications_user_created", "user_id", "created_at"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     message = db.Column(db.Text, nullable=False)
     is_read = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# Per-user unread notification counter (see notification_service.py)
+class NotificationCounter(db.Model):
+    __tablename__ = "notification_counters"
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    unread = db.Column(db.Integer, nullable=False, default=0)
@@ -0,0 +1,14 @@
+"""
+Notification Dispatcher
+Background worker that takes notifications off the request path: committed
+notifications are put on a bounded in-process queue and batch-inserted by a
+single thread (see batch_writer.BatchWriter).
+"""
+from batch_writer import BatchWriter
+from notification_service import write_notifications
+
+
+class NotificationDispatcher(BatchWriter):
+    def __init__(self, app, max_queue=10000, batch_size=200, flush_interval=0.05, put_timeout=0.01):
+        super().__init__(app, write_notifications, "notification-dispatcher", max_queue=max_queue,
+                         batch_size=batch_size, flush_interval=flush_interval, put_timeout=put_timeout)
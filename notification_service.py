@@ -0,0 +1,182 @@
+"""
+Notification Service
+Single write path for notifications so the per-user unread counter stays
+exact, a keyset-paginated feed over (user_id, created_at), and a retention
+job that expires old read rows in bounded batches.
+When a NotificationDispatcher is installed, new notifications are handed to
+it after the caller's commit instead of being inserted inline.
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import insert, update, select, func, literal
+from models import db, Notification, NotificationCounter
+from db_profiles import upsert_insert
+from pagination import keyset_paginate
+from batch_writer import defer_until_commit, install_after_commit_handoff
+
+
+FEED_SORTS = {"newest": (Notification.created_at, True)}
+FEED_PAGE_SIZE = 20
+RETENTION = timedelta(days=90)
+COMPACT_BATCH_SIZE = 1000
+
+
+# ================= COUNTER =================
+def _bump_unread(user_id, delta, executor=None):
+    stmt = upsert_insert(db, NotificationCounter).values(user_id=user_id, unread=max(delta, 0))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[NotificationCounter.user_id],
+        set_={"unread": NotificationCounter.unread + delta},
+    )
+    (executor or db.session).execute(stmt)
+
+
+def unread_count(user_id):
+    """Unread notifications for the user, served from the counter row"""
+    counter = db.session.get(NotificationCounter, user_id)
+    if counter is None:
+        return seed_unread_counter(user_id)
+    return max(counter.unread, 0)
+
+
+def _unread_rows(user_id_column):
+    return (Notification.user_id == user_id_column) & (Notification.is_read == False)  # noqa: E712
+
+
+def seed_unread_counter(user_id):
+    """Create a missing counter from the table; returns the user's unread count"""
+    stmt = upsert_insert(db, NotificationCounter).from_select(
+        ["user_id", "unread"],
+        select(literal(user_id), func.count(Notification.id)).where(_unread_rows(user_id)),
+    ).on_conflict_do_nothing(index_elements=[NotificationCounter.user_id])
+    # Count and insert in one statement, so an increment the dispatcher commits meanwhile is never
+    # overwritten, on a connection of its own, so the write does not upgrade the request's older snapshot
+    with db.engine.begin() as connection:
+        connection.execute(stmt)
+        unread = connection.execute(
+            select(NotificationCounter.unread).where(NotificationCounter.user_id == user_id)
+        ).scalar_one()
+    return max(unread, 0)
+
+
+def repair_unread_counters():
+    """Drift repair: recount every counter from the table and add missing ones; returns counters fixed"""
+    actual = select(func.count(Notification.id)).where(
+        _unread_rows(NotificationCounter.user_id)
+    ).scalar_subquery()
+    missing = upsert_insert(db, NotificationCounter).from_select(
+        ["user_id", "unread"],
+        select(Notification.user_id, func.count(Notification.id))
+        .where(Notification.is_read == False)  # noqa: E712
+        .group_by(Notification.user_id),
+    ).on_conflict_do_nothing(index_elements=[NotificationCounter.user_id])
+    with db.engine.begin() as connection:
+        fixed = connection.execute(
+            update(NotificationCounter).where(NotificationCounter.unread != actual).values(unread=actual)
+        ).rowcount
+        fixed += connection.execute(missing).rowcount
+    return fixed
+
+
+def ensure_notification_counters():
+    """Seed counters from existing rows on first start, so a missing counter always means zero unread"""
+    if NotificationCounter.query.first() or not Notification.query.first():
+        return
+    db.session.execute(insert(NotificationCounter).from_select(
+        ["user_id", "unread"],
+        select(Notification.user_id, func.count(Notification.id))
+        .where(Notification.is_read == False)  # noqa: E712
+        .group_by(Notification.user_id),
+    ))
+    db.session.commit()
+
+
+# ================= WRITERS =================
+PENDING_KEY = "pending_notifications"
+
+
+def notify(user_id, message):
+    """Send one unread notification as part of the caller's transaction"""
+    notify_many([(user_id, message)])
+
+
+def notify_many(entries):
+    """
+    Send (user_id, message) notifications as part of the caller's transaction.
+    Without a dispatcher they are inserted inline; with one they are held on
+    the session and queued only once the transaction commits.
+    """
+    if not entries:
+        return
+    now = datetime.utcnow()
+    rows = [(user_id, message, now) for user_id, message in entries]
+    if current_app.extensions.get("notification_dispatcher") is None:
+        write_notifications(rows)
+    else:
+        defer_until_commit(PENDING_KEY, rows)
+
+
+def write_notifications(rows, executor=None):
+    """Bulk-insert (user_id, message, created_at) rows and bump the unread counters"""
+    executor = executor or db.session
+    executor.execute(insert(Notification), [
+        {"user_id": user_id, "message": message, "is_read": False, "created_at": created_at}
+        for user_id, message, created_at in rows
+    ])
+    for user_id, added in Counter(user_id for user_id, _, _ in rows).items():
+        _bump_unread(user_id, added, executor)
+
+
+def install_dispatcher(app, dispatcher):
+    """Route notify()/notify_many() of this app through dispatcher after each commit"""
+    install_after_commit_handoff(app, "notification_dispatcher", PENDING_KEY, dispatcher)
+
+
+def mark_read(notification):
+    """Mark one notification read in the caller's transaction"""
+    if not notification.is_read:
+        notification.is_read = True
+        _bump_unread(notification.user_id, -1)
+
+
+def mark_all_read(user_id):
+    """Mark every unread notification read in the caller's transaction"""
+    Notification.query.filter_by(user_id=user_id, is_read=False).update(
+        {"is_read": True}, synchronize_session=False
+    )
+    db.session.execute(
+        update(NotificationCounter).where(NotificationCounter.user_id == user_id).values(unread=0)
+    )
+
+
+# ================= FEED =================
+def feed_page(user_id, cursor=None, page_size=FEED_PAGE_SIZE):
+    """One page of the user's notifications, newest first"""
+    return keyset_paginate(
+        Notification.query.filter_by(user_id=user_id), "newest", FEED_SORTS, Notification.id,
+        cursor=cursor, page_size=page_size,
+    )
+
+
+# ================= RETENTION =================
+def compact_notifications(retention=RETENTION, batch_size=COMPACT_BATCH_SIZE, max_batches=None):
+    """
+    Delete read notifications older than retention, batch_size rows per
+    transaction so writers are never blocked for long; returns rows deleted.
+    Unread rows are kept, so the unread counters are unaffected.
+    """
+    cutoff = datetime.utcnow() - retention
+    deleted = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = select(Notification.id).where(
+            Notification.is_read == True, Notification.created_at < cutoff  # noqa: E712
+        ).limit(batch_size)
+        removed = Notification.query.filter(Notification.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        deleted += removed
+        batches += 1
+        if removed < batch_size:
+            break
+    return deleted
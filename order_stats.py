@@ -0,0 +1,86 @@
+"""
+Order Statistics
+Per-status order counts and revenue computed with one grouped SQL query,
+optionally served from the materialized order_status_stats table
+(ORDER_STATS_MATERIALIZED) that checkout and cancellation keep current.
+"""
+from decimal import Decimal
+from flask import current_app
+from sqlalchemy import func
+from models import db, Order, OrderStatusStats
+from db_profiles import upsert_insert
+
+
+REVENUE_STATUS = "Completed"
+
+
+def materialized_enabled():
+    return current_app.config.get('ORDER_STATS_MATERIALIZED', False)
+
+
+def aggregate_order_stats():
+    """{status: (count, revenue)} straight from the orders table, in one GROUP BY"""
+    rows = db.session.query(
+        Order.order_status,
+        func.count(Order.id),
+        func.coalesce(func.sum(Order.total_price), 0),
+    ).group_by(Order.order_status).all()
+    return {status: (count, Decimal(str(revenue))) for status, count, revenue in rows}
+
+
+def materialized_order_stats():
+    return {
+        row.order_status: (row.order_count, Decimal(str(row.revenue)))
+        for row in OrderStatusStats.query.all()
+    }
+
+
+def order_stats_summary():
+    """Figures shown on the admin orders page"""
+    by_status = materialized_order_stats() if materialized_enabled() else aggregate_order_stats()
+    return {
+        "by_status": by_status,
+        "total_orders": sum(count for count, _ in by_status.values()),
+        "total_revenue": by_status.get(REVENUE_STATUS, (0, Decimal("0.00")))[1],
+        "completed_count": by_status.get("Completed", (0, None))[0],
+        "cancelled_count": by_status.get("Cancelled", (0, None))[0],
+    }
+
+
+def _apply_delta(status, count, revenue):
+    stmt = upsert_insert(db, OrderStatusStats).values(order_status=status, order_count=count, revenue=revenue)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[OrderStatusStats.order_status],
+        set_={"order_count": OrderStatusStats.order_count + stmt.excluded.order_count,
+              "revenue": OrderStatusStats.revenue + stmt.excluded.revenue},
+    )
+    db.session.execute(stmt)
+
+
+def record_order_placed(status, total_price):
+    """Count a new order; call inside the checkout transaction"""
+    if materialized_enabled():
+        _apply_delta(status, 1, total_price)
+
+
+def record_status_change(old_status, new_status, total_price):
+    """Move an order between statuses; call inside the transaction that changes it"""
+    if materialized_enabled() and old_status != new_status:
+        _apply_delta(old_status, -1, -(total_price or 0))
+        _apply_delta(new_status, 1, total_price or 0)
+
+
+def rebuild_order_stats():
+    """Recompute the materialized table from the orders table; returns the number of statuses"""
+    OrderStatusStats.query.delete()
+    by_status = aggregate_order_stats()
+    for status, (count, revenue) in by_status.items():
+        db.session.add(OrderStatusStats(order_status=status, order_count=count, revenue=revenue))
+    db.session.commit()
+    return len(by_status)
+
+
+def ensure_order_stats():
+    """Build the materialized table on first start when it is enabled"""
+    if materialized_enabled() and not OrderStatusStats.query.first() and Order.query.first():
+        rebuild_order_stats()
@@ -0,0 +1,140 @@
+"""
+Keyset (seek) Pagination
+Pages are addressed by an opaque cursor holding the (sort value, id) of the
+last row shown, so every page is one indexed range scan no matter how deep.
+NULL sort values sort as the lowest value (SQLite's native order): last when
+descending, first when ascending.
+"""
+import base64
+import json
+from collections import namedtuple
+from datetime import datetime
+from decimal import Decimal
+from flask import request, abort
+from sqlalchemy import and_, or_
+
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+Page = namedtuple("Page", ["items", "next_cursor", "page_size", "sort"])
+
+
+class InvalidCursor(ValueError):
+    """Raised for cursor tokens that were tampered with or belong to another sort"""
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(sort, sort_value, row_id):
+    payload = json.dumps([sort, _encode_value(sort_value), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, sort):
+    """Return (sort_value, row_id) from a cursor token produced for the same sort key"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        cursor_sort, sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        sort_value = _decode_value(sort_value)
+    except (ValueError, TypeError):
+        raise InvalidCursor(token)
+    if cursor_sort != sort or not isinstance(row_id, int) or isinstance(row_id, bool):
+        raise InvalidCursor(token)
+    if sort_value is not None and (isinstance(sort_value, bool)
+                                   or not isinstance(sort_value, (str, int, float, datetime))):
+        raise InvalidCursor(token)
+    return sort_value, row_id
+
+
+def _check_sort_value(column, sort_value, token):
+    """Raise InvalidCursor unless sort_value is NULL or fits the sort column's type"""
+    if sort_value is None:
+        return
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return
+    if python_type in (int, float, Decimal):
+        fits = isinstance(sort_value, (int, float)) and (python_type is not int or isinstance(sort_value, int))
+    else:
+        fits = isinstance(sort_value, python_type)
+    if not fits:
+        raise InvalidCursor(token)
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Clamp a user-supplied page size to 1..maximum"""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
+
+
+def resolve_sort(requested, allowed, default):
+    """Validate a sort key against the view's whitelist of {name: (column, descending)}"""
+    return requested if requested in allowed else default
+
+
+def keyset_paginate(query, sort, allowed, id_column, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Fetch one page of query ordered by the sort key and then id (the tie-breaker).
+    allowed maps sort names to (column, descending); sort must already be validated.
+    Raises InvalidCursor for a bad cursor token.
+    """
+    column, descending = allowed[sort]
+    if descending:
+        order = (column.desc().nulls_last(), id_column.desc())
+    else:
+        order = (column.asc().nulls_first(), id_column.asc())
+
+    # The rest of the ordering after the cursor, as consecutive segments; each is a
+    # single index range, since an OR with IS NULL would force a full sort
+    segments = [query]
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor, sort)
+        _check_sort_value(column, sort_value, cursor)
+        if sort_value is None:
+            after_id = id_column < last_id if descending else id_column > last_id
+            segments = [query.filter(column.is_(None), after_id)]
+            if not descending:
+                segments.append(query.filter(column.isnot(None)))
+        elif descending:
+            segments = [query.filter(or_(column < sort_value, and_(column == sort_value, id_column < last_id)))]
+            if getattr(column.expression, "nullable", True):
+                segments.append(query.filter(column.is_(None)))
+        else:
+            segments = [query.filter(or_(column > sort_value, and_(column == sort_value, id_column > last_id)))]
+
+    rows = []
+    for segment in segments:
+        rows += segment.order_by(*order).limit(page_size + 1 - len(rows)).all()
+        if len(rows) > page_size:
+            break
+    items = rows[:page_size]
+    next_cursor = None
+    if len(rows) > page_size:
+        last = items[-1]
+        next_cursor = encode_cursor(sort, getattr(last, column.key), getattr(last, id_column.key))
+    return Page(items, next_cursor, page_size, sort)
+
+
+def paginate_request(query, allowed, default_sort, id_column, default_page_size=DEFAULT_PAGE_SIZE):
+    """Paginate query using the sort, cursor and per_page arguments of the current request"""
+    sort = resolve_sort(request.args.get("sort"), allowed, default_sort)
+    page_size = parse_page_size(request.args.get("per_page"), default=default_page_size)
+    try:
+        return keyset_paginate(query, sort, allowed, id_column, request.args.get("cursor"), page_size)
+    except InvalidCursor:
+        abort(400)
@@ -0,0 +1,141 @@
+"""
+Password Hashing Service
+Hashes and verifies passwords with a configurable scheme and cost, off the
+request thread (process pool by default, warmed on the first request), with a cap on in-flight hashes so
+a login storm cannot starve every other route. Logins transparently upgrade
+hashes that were made with outdated parameters.
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+DEFAULT_METHOD = "scrypt:32768:8:1"
+# Hash workers are never forked from the app process, whose background threads (dispatchers,
+# sweeper) may hold locks at fork time; the fork server only preloads the hashing code
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class PasswordServiceBusy(Exception):
+    """Raised when too many hashes are already in flight"""
+
+
+def is_hashed(password):
+    """Check if password is already hashed"""
+    if not password:
+        return False
+    # Werkzeug hashes start with specific prefixes
+    return (password.startswith("$2b$") or
+            password.startswith("$2a$") or
+            password.startswith("$pbkdf2:") or
+            password.startswith("pbkdf2:") or
+            password.startswith("scrypt:") or
+            password.startswith("$argon2"))
+
+
+def hash_method(stored):
+    """Scheme and cost parameters of a Werkzeug hash, e.g. 'scrypt:32768:8:1'; None if not Werkzeug"""
+    if not is_hashed(stored) or "$" not in stored or stored.startswith("$"):
+        return None
+    return stored.split("$", 1)[0]
+
+
+def _verify(stored, password):
+    # Only Werkzeug hashes verify; legacy plain-text rows are hashed by migrate_hash_plaintext_passwords.py
+    if hash_method(stored) is None:
+        return False
+    try:
+        return check_password_hash(stored, password)
+    except ValueError:  # malformed hash parameters
+        return False
+
+
+class PasswordService:
+    def __init__(self, method=DEFAULT_METHOD, executor="process", workers=None, max_pending=None,
+                 acquire_timeout=2.0):
+        self.method = method
+        self.executor_kind = executor
+        self.workers = workers or os.cpu_count() or 1
+        self.acquire_timeout = acquire_timeout
+        self._slots = threading.BoundedSemaphore(max_pending or self.workers * 4)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self.executor_kind == "inline":
+            return None
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.executor_kind == "process":
+                        context = multiprocessing.get_context(START_METHOD)
+                        if START_METHOD == "forkserver":
+                            context.set_forkserver_preload(["werkzeug.security", __name__])
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                    else:
+                        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+                    atexit.register(self.shutdown)
+        return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise PasswordServiceBusy()
+        try:
+            executor = self._get_executor()
+            if executor is None:
+                return fn(*args)
+            return executor.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def warm(self):
+        """Start the pool and every worker now, instead of on the first logins"""
+        executor = self._get_executor()
+        if executor is not None:
+            wait([executor.submit(os.getpid) for _ in range(self.workers)])
+
+    def install_warmup(self, app):
+        """Warm the pool in the background when the process serves its first request (never in CLI commands)"""
+        started = []
+        lock = threading.Lock()
+
+        @app.before_request
+        def _warm_password_pool():
+            if not started:
+                with lock:
+                    if not started:
+                        started.append(threading.Thread(target=self.warm, name="password-pool-warmup", daemon=True))
+                        started[0].start()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, stored, password):
+        """Return (matches, needs_rehash)"""
+        if not stored or password is None:
+            return False, False
+        matches = self._run(_verify, stored, password)
+        return matches, matches and self.needs_rehash(stored)
+
+    def needs_rehash(self, stored):
+        return hash_method(stored) != self.method
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def create_password_service(app):
+    """Build the service from PASSWORD_HASH_METHOD / PASSWORD_EXECUTOR / PASSWORD_WORKERS / PASSWORD_MAX_PENDING"""
+    service = PasswordService(
+        method=app.config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD),
+        executor=app.config.get('PASSWORD_EXECUTOR', 'process'),
+        workers=app.config.get('PASSWORD_WORKERS'),
+        max_pending=app.config.get('PASSWORD_MAX_PENDING'),
+    )
+    service.install_warmup(app)
+    return service
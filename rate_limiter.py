@@ -0,0 +1,206 @@
+"""
+Rate Limiter
+Per-IP and per-email token buckets in front of the auth endpoints. Checks run
+in a before_request hook, so a rejected request never reaches the app
+database or the password hasher. Buckets live in process memory or in a
+small SQLite file of their own (shared by every worker on the host).
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from flask import request
+
+
+# capacity tokens refilled every period seconds; endpoints naming the same bucket share it,
+# and only requests with one of the listed methods are counted
+Limit = namedtuple("Limit", ["scope", "capacity", "period", "bucket", "methods"], defaults=(None, ("POST",)))
+
+# Both reset endpoints accept the 6-digit code (reset_password also on GET ?token=), so they draw
+# from one "reset_code" bucket and the code cannot be guessed through either one
+RESET_CODE_LIMITS = [Limit("ip", 10, 300, "reset_code", ("GET", "POST")),
+                     Limit("email", 5, 900, "reset_code", ("GET", "POST"))]
+
+# {endpoint: [Limit, ...]}
+DEFAULT_LIMITS = {
+    "login": [Limit("ip", 20, 60), Limit("email", 5, 60)],
+    "forgot_password": [Limit("ip", 5, 300), Limit("email", 3, 900)],
+    "verify_reset_code": [limit._replace(methods=("POST",)) for limit in RESET_CODE_LIMITS],
+    "reset_password": RESET_CODE_LIMITS,
+}
+
+
+def _refill(tokens, updated, now, limit):
+    return min(limit.capacity, tokens + (now - updated) * limit.capacity / limit.period)
+
+
+def _retry_after(tokens, limit):
+    return max(1, int((1 - tokens) * limit.period / limit.capacity) + 1)
+
+
+# ================= BACKENDS =================
+class MemoryBucketStore:
+    """Buckets in a bounded per-process dict"""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, limit, now):
+        """Take one token; returns 0 if allowed, otherwise seconds until a token is available"""
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (limit.capacity, now))
+            tokens = _refill(tokens, updated, now, limit)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return 0 if allowed else _retry_after(tokens, limit)
+
+    def purge(self, older_than):
+        """Drop buckets idle since before older_than (they would be full again anyway)"""
+        with self._lock:
+            # Least recently used first, so stop at the first bucket that is still fresh
+            while self._buckets and next(iter(self._buckets.values()))[1] < older_than:
+                self._buckets.popitem(last=False)
+
+
+class SqliteBucketStore:
+    """Buckets in a standalone SQLite file, so several worker processes share limits"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_buckets "
+            "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def consume(self, key, limit, now):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?", (key,)).fetchone()
+            tokens = _refill(*(row or (limit.capacity, now)), now, limit)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            conn.execute(
+                "INSERT INTO rate_limit_buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (key, tokens, now),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return 0 if allowed else _retry_after(tokens, limit)
+
+    def purge(self, older_than):
+        """Drop buckets idle since before older_than (they would be full again anyway)"""
+        self._connection().execute("DELETE FROM rate_limit_buckets WHERE updated < ?", (older_than,))
+
+
+def _longest_period(limits):
+    return max((limit.period for endpoint_limits in limits.values() for limit in endpoint_limits), default=0)
+
+
+# ================= LIMITER =================
+class RateLimiter:
+    def __init__(self, store, limits=None, purge_every=1000):
+        self.store = store
+        self.limits = DEFAULT_LIMITS if limits is None else limits
+        # Every purge_every store hits, buckets idle for longer than the longest period are dropped
+        self.purge_every = purge_every
+        self.idle_after = _longest_period(self.limits)
+        self._consumed = 0
+        self._blocked = {}  # key -> time.time() until which its bucket is known to be empty
+        self.max_blocked = 10000
+        self._lock = threading.Lock()
+        self.counters = {}
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def key_value(self, scope):
+        if scope == "ip":
+            return request.remote_addr or "unknown"
+        if scope == "email":
+            email = request.form.get("email") or (request.view_args or {}).get("email")
+            return email.strip().lower() if email else None
+        raise ValueError(f"Unknown rate limit scope: {scope}")
+
+    def check(self):
+        """Return seconds to wait if the current request is over a limit, else 0"""
+        limits = [limit for limit in self.limits.get(request.endpoint, ()) if request.method in limit.methods]
+        if not limits:
+            return 0
+        now = time.time()
+        for limit in limits:
+            value = self.key_value(limit.scope)
+            if value is None:
+                continue
+            key = f"{limit.bucket or request.endpoint}:{limit.scope}:{value}"
+            # Known-empty buckets are rejected from memory without touching the store
+            blocked_until = self._blocked.get(key)
+            if blocked_until and blocked_until > now:
+                self._count(f"{request.endpoint}:{limit.scope}:rejected")
+                return int(blocked_until - now) + 1
+            retry_after = self.store.consume(key, limit, now)
+            self._maybe_purge(now)
+            if retry_after:
+                with self._lock:
+                    if len(self._blocked) >= self.max_blocked:
+                        self._blocked = {k: until for k, until in self._blocked.items() if until > now}
+                    self._blocked[key] = now + retry_after
+                self._count(f"{request.endpoint}:{limit.scope}:rejected")
+                return retry_after
+            self._blocked.pop(key, None)
+        self._count(f"{request.endpoint}:allowed")
+        return 0
+
+    def _maybe_purge(self, now):
+        with self._lock:
+            self._consumed += 1
+            due = self.purge_every and self._consumed % self.purge_every == 0
+        if due:
+            self.store.purge(now - self.idle_after)
+
+    def init_app(self, app):
+        @app.before_request
+        def _enforce_rate_limits():
+            retry_after = self.check()
+            if retry_after:
+                return ("<h2>Too many attempts, please try again later.</h2>", 429,
+                        {"Retry-After": str(retry_after)})
+
+
+def create_rate_limiter(app):
+    """Build the limiter selected by RATE_LIMIT_BACKEND ('memory' or 'sqlite')"""
+    backend = app.config.get('RATE_LIMIT_BACKEND', 'memory')
+    if backend == 'memory':
+        store = MemoryBucketStore()
+    elif backend == 'sqlite':
+        path = app.config.get('RATE_LIMIT_SQLITE_PATH')
+        if not path:
+            os.makedirs(app.instance_path, exist_ok=True)
+            path = os.path.join(app.instance_path, 'rate_limits.db')
+        store = SqliteBucketStore(path)
+    else:
+        raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {backend}")
+    limiter = RateLimiter(store, app.config.get('RATE_LIMITS'))
+    limiter.init_app(app)
+    return limiter
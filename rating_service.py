@@ -0,0 +1,45 @@
+"""
+Rating Aggregate Service
+Keeps Game.rating_count / Game.rating_sum in step with Review.rating inside
+the review write transactions, and repairs drift with a reconciliation job.
+"""
+from sqlalchemy import func, select, update, or_
+from models import db, Game, Review
+from catalog_cache import bump_catalog_version
+
+
+def apply_rating_change(game_id, old_rating=None, new_rating=None):
+    """
+    Adjust a game's aggregate for one review going from old_rating to new_rating
+    (None = no rating / no review); runs in the caller's transaction
+    """
+    count_delta = (new_rating is not None) - (old_rating is not None)
+    sum_delta = (new_rating or 0.0) - (old_rating or 0.0)
+    if not count_delta and not sum_delta:
+        return
+    db.session.execute(
+        update(Game)
+        .where(Game.id == game_id)
+        .values(rating_count=Game.rating_count + count_delta, rating_sum=Game.rating_sum + sum_delta)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def reconcile_ratings():
+    """Recompute every game's aggregate from reviews; returns the number of games repaired"""
+    actual_count = (
+        select(func.count(Review.rating)).where(Review.game_id == Game.id).scalar_subquery()
+    )
+    actual_sum = (
+        select(func.coalesce(func.sum(Review.rating), 0.0)).where(Review.game_id == Game.id).scalar_subquery()
+    )
+    result = db.session.execute(
+        update(Game)
+        .where(or_(Game.rating_count != actual_count, func.abs(Game.rating_sum - actual_sum) > 1e-6))
+        .values(rating_count=actual_count, rating_sum=actual_sum)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        bump_catalog_version()
+    db.session.commit()
+    return result.rowcount
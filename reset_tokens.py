@@ -0,0 +1,92 @@
+"""
+Password Reset Token Store
+Issues, looks up and consumes 6-digit reset codes through the
+(email, used, expires_at) index. Superseded and consumed codes are deleted
+rather than flagged, and a sweeper removes expired rows in bounded batches,
+so the table only ever holds live codes.
+"""
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from models import db, PasswordResetToken
+
+
+TOKEN_TTL = timedelta(minutes=15)
+SWEEP_BATCH_SIZE = 500
+
+
+def issue_token(email):
+    """Replace any live code for email with a new one; runs in the caller's transaction"""
+    PasswordResetToken.query.filter_by(email=email, used=False).delete(synchronize_session=False)
+    code = str(random.randint(100000, 999999))
+    db.session.add(PasswordResetToken(email=email, token=code, expires_at=datetime.utcnow() + TOKEN_TTL))
+    return code
+
+
+def find_token(email, code):
+    """The unused token row for (email, code), expired or not; None if there is none"""
+    if not code:
+        return None
+    return PasswordResetToken.query.filter_by(email=email, used=False, token=code).first()
+
+
+def is_expired(token):
+    return datetime.utcnow() > token.expires_at
+
+
+def consume_token(token):
+    """Remove a used or expired token; runs in the caller's transaction"""
+    db.session.delete(token)
+
+
+def sweep_tokens(batch_size=SWEEP_BATCH_SIZE, max_batches=None):
+    """Delete expired (and legacy used) tokens, one short transaction per batch; returns rows deleted"""
+    deleted = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = select(PasswordResetToken.id).where(
+            PasswordResetToken.expires_at < datetime.utcnow()
+        ).limit(batch_size)
+        removed = PasswordResetToken.query.filter(PasswordResetToken.id.in_(ids)).delete(
+            synchronize_session=False
+        )
+        db.session.commit()
+        deleted += removed
+        batches += 1
+        if removed < batch_size:
+            break
+    return deleted
+
+
+def start_sweeper(app, interval):
+    """Run sweep_tokens every interval seconds on a daemon thread"""
+    def _loop():
+        while True:
+            time.sleep(interval)
+            try:
+                with app.app_context():
+                    sweep_tokens()
+            except Exception:
+                app.logger.exception("Password reset token sweep failed")
+
+    thread = threading.Thread(target=_loop, name="reset-token-sweeper", daemon=True)
+    thread.start()
+    return thread
+
+
+def install_sweeper(app, interval):
+    """
+    Start the sweeper with the first request the process serves, so importing
+    the app for `flask` CLI commands, migrations or benchmarks starts no thread
+    """
+    started = []
+    lock = threading.Lock()
+
+    @app.before_request
+    def _start_sweeper():
+        if not started:
+            with lock:
+                if not started:
+                    started.append(start_sweeper(app, interval))
@@ -0,0 +1,92 @@
+"""
+Page and Fragment Cache
+Whole rendered responses of anonymous catalog pages, keyed on path, query
+string, theme and language, plus rendered template fragments (the browse
+game grid) that logged-in pages reuse. Both are versioned on the catalog
+version (see catalog_cache.py), so catalog and review writes invalidate
+them in every worker. Cached pages carry an ETag and Last-Modified and
+answer conditional requests with 304.
+"""
+import hashlib
+from collections import namedtuple
+from datetime import datetime, timezone
+from functools import wraps
+from flask import current_app, request, session, make_response, render_template
+from markupsafe import Markup
+from catalog_cache import CatalogCache, NullCatalogCache
+
+
+CachedPage = namedtuple("CachedPage", ["body", "mimetype", "etag", "last_modified"])
+
+
+class _Uncacheable(Exception):
+    """The rendered response must not be stored (error status, session write, streamed body)"""
+
+
+def create_response_caches(app):
+    """Build the page and fragment caches from PAGE_CACHE / PAGE_CACHE_TTL / PAGE_CACHE_SIZE"""
+    if app.config.get('PAGE_CACHE', True):
+        ttl = app.config.get('PAGE_CACHE_TTL', 300)
+        size = app.config.get('PAGE_CACHE_SIZE', 1000)
+        pages, fragments = CatalogCache(ttl, size), CatalogCache(ttl, size)
+    else:
+        pages, fragments = NullCatalogCache(), NullCatalogCache()
+    app.extensions["page_cache"] = pages
+    app.extensions["fragment_cache"] = fragments
+    return pages, fragments
+
+
+def _is_anonymous_get():
+    # Flashed messages are one-off, so a request that has any is never cached
+    return (request.method == "GET" and not session.get("user_id") and not session.get("is_admin")
+            and "_flashes" not in session)
+
+
+def _page_key():
+    return ("page", request.path, request.query_string, session.get("theme", "dark"),
+            session.get("language", "en"))
+
+
+def _render_page(view, args, kwargs):
+    response = make_response(view(*args, **kwargs))
+    if response.status_code != 200 or session.modified or response.direct_passthrough:
+        return response, None
+    body = response.get_data()
+    page = CachedPage(body, response.mimetype, hashlib.sha1(body).hexdigest(),
+                      datetime.now(timezone.utc).replace(microsecond=0))
+    return response, page
+
+
+def cache_anonymous_page(view):
+    """Serve the view from the page cache for anonymous GETs"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not _is_anonymous_get():
+            return view(*args, **kwargs)
+        cache = current_app.extensions["page_cache"]
+        fresh = {}
+
+        def load():
+            fresh["response"], page = _render_page(view, args, kwargs)
+            if page is None:
+                raise _Uncacheable()
+            return page
+
+        try:
+            page = cache.get_or_load(_page_key(), load)
+        except _Uncacheable:
+            return fresh["response"]
+        response = current_app.response_class(page.body, mimetype=page.mimetype)
+        response.set_etag(page.etag)
+        response.last_modified = page.last_modified
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+    return wrapper
+
+
+def cached_fragment(key, template, **context):
+    """render_template(template, **context) through the fragment cache; key must cover everything in context"""
+    cache = current_app.extensions.get("fragment_cache")
+    if cache is None:
+        return Markup(render_template(template, **context))
+    return Markup(cache.get_or_load(("fragment", template) + tuple(key), lambda: render_template(template, **context)))
@@ -0,0 +1,119 @@
+"""
+Schema Index Audit
+Creates columns and indexes declared in models.py that an older database is missing,
+and runs EXPLAIN QUERY PLAN over the queries the app issues to flag full
+table scans and sorts that no index covers.
+"""
+from collections import namedtuple
+from sqlalchemy import func, inspect, text
+from models import (db, User, Game, Order, OrderItem, ActivityLog,
+                    PasswordResetToken, Review, Notification, UserLibrary)
+
+
+SAMPLE_DATE = "2024-01-01 00:00:00"
+
+PlanFinding = namedtuple("PlanFinding", ["query", "level", "detail"])
+
+
+def ensure_columns():
+    """
+    db.create_all() skips existing tables, so add their new columns here; returns
+    "table.column" names added. Columns must be nullable or have a server_default.
+    """
+    added = []
+    inspector = inspect(db.engine)
+    compiler = db.engine.dialect.ddl_compiler(db.engine.dialect, None)
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    raise RuntimeError(f"Cannot add NOT NULL column {table.name}.{column.name} without a server_default")
+                connection.execute(text(
+                    f"ALTER TABLE {table.name} ADD COLUMN {compiler.get_column_specification(column)}"
+                ))
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def ensure_indexes():
+    """db.create_all() skips existing tables, so add their new indexes here; returns names created"""
+    created = []
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(db.engine)
+                created.append(index.name)
+    return created
+
+
+def audited_queries():
+    """(name, query, allow_scan) for the hot queries issued by the views"""
+    return [
+        ("login user lookup", User.query.filter_by(email="a@example.com"), False),
+        ("browse newest page",
+         Game.query.filter(Game.date_added < SAMPLE_DATE).order_by(Game.date_added.desc(), Game.id.desc()).limit(25), False),
+        ("cart pricing", Game.query.filter(Game.id.in_([1, 2, 3])), False),
+        ("game reviews", Review.query.filter_by(game_id=1).order_by(Review.created_at.desc()), False),
+        ("user review for game", Review.query.filter_by(game_id=1, user_id=1), False),
+        ("notifications feed",
+         Notification.query.filter_by(user_id=1).order_by(Notification.created_at.desc()), False),
+        ("unread notifications", Notification.query.filter_by(user_id=1, is_read=False), False),
+        ("user orders", Order.query.filter_by(user_id=1), False),
+        ("admin orders page",
+         Order.query.filter(Order.order_date < SAMPLE_DATE).order_by(Order.order_date.desc(), Order.id.desc()).limit(25), False),
+        ("order items", OrderItem.query.filter_by(order_id=1), False),
+        ("order stats",
+         db.session.query(Order.order_status, func.count(Order.id), func.sum(Order.total_price))
+         .group_by(Order.order_status), True),
+        ("reset token lookup", PasswordResetToken.query.filter_by(email="a@example.com", token="123456", used=False), False),
+        ("reset token sweep", PasswordResetToken.query.filter(PasswordResetToken.expires_at < SAMPLE_DATE).limit(500), False),
+        ("admin activity", ActivityLog.query.order_by(ActivityLog.date.desc()).limit(50), False),
+        ("admin activity range",
+         ActivityLog.query.filter(ActivityLog.date >= SAMPLE_DATE).order_by(ActivityLog.date.desc(), ActivityLog.id.desc())
+         .limit(50), False),
+        ("library", UserLibrary.query.join(UserLibrary.game).filter(UserLibrary.user_id == 1), False),
+    ]
+
+
+def explain(query):
+    """EXPLAIN QUERY PLAN detail lines for an ORM query"""
+    compiled = query.statement.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True})
+    rows = db.session.execute(db.text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return [row[-1] for row in rows]
+
+
+def audit_query_plans():
+    """Findings for every audited query: 'scan' for full table scans, 'sort' for temp B-tree sorts"""
+    findings = []
+    for name, query, allow_scan in audited_queries():
+        for detail in explain(query):
+            if detail.startswith("SCAN ") and " USING " not in detail and not allow_scan:
+                findings.append(PlanFinding(name, "scan", detail))
+            elif "USE TEMP B-TREE" in detail and not allow_scan:
+                findings.append(PlanFinding(name, "sort", detail))
+    return findings
+
+
+def log_audit(logger):
+    """Startup variant of print_audit for QUERY_PLAN_AUDIT"""
+    for finding in audit_query_plans():
+        logger.warning("Query plan %s in '%s': %s", finding.level, finding.query, finding.detail)
+
+
+def print_audit():
+    created = ensure_indexes()
+    if created:
+        print(f"Created missing indexes: {', '.join(created)}")
+    findings = audit_query_plans()
+    for finding in findings:
+        print(f"  [{finding.level.upper()}] {finding.query}: {finding.detail}")
+    if findings:
+        print(f"\n✗ {len(findings)} query plan issue(s) found")
+    else:
+        print("✓ All audited queries use indexes")
+    return findings
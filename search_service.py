@@ -0,0 +1,123 @@
+"""
+Game Search Service
+SQLite FTS5 index over Game.title and Game.category with prefix matching
+and bm25 relevance ranking. Falls back to ILIKE on databases without FTS5.
+"""
+import re
+from flask import current_app
+from sqlalchemy import text, or_
+from sqlalchemy.exc import OperationalError
+from models import db, Game
+
+
+FTS_TABLE = "games_fts"
+TITLE_WEIGHT = 10.0
+CATEGORY_WEIGHT = 1.0
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_enabled():
+    """Set by create_search_index(); probed once when the app started without initializing the database"""
+    enabled = current_app.extensions.get("game_search_fts")
+    if enabled is None:
+        enabled = db.engine.dialect.name == "sqlite" and db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+        ).first() is not None
+        current_app.extensions["game_search_fts"] = enabled
+    return enabled
+
+
+def create_search_index():
+    """Create the FTS5 table if missing and fill it from the games table; returns True if FTS5 is usable"""
+    enabled = False
+    if db.engine.dialect.name == "sqlite":
+        try:
+            exists = db.session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": FTS_TABLE},
+            ).first()
+            if not exists:
+                db.session.execute(text(
+                    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                    "title, category, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+                ))
+                _fill_index()
+            db.session.commit()
+            enabled = True
+        except OperationalError:
+            # SQLite build without FTS5
+            db.session.rollback()
+    current_app.extensions["game_search_fts"] = enabled
+    return enabled
+
+
+def _fill_index():
+    db.session.execute(text(
+        f"INSERT INTO {FTS_TABLE} (rowid, title, category) "
+        "SELECT id, title, COALESCE(category, '') FROM games"
+    ))
+
+
+def rebuild_search_index():
+    """Re-index the whole catalog, e.g. after games were changed outside the app; None without FTS5"""
+    if not fts_enabled():
+        return None
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    _fill_index()
+    db.session.commit()
+    return db.session.query(Game).count()
+
+
+def index_game(game):
+    """Add or refresh one game in the index; runs in the caller's transaction"""
+    if not fts_enabled():
+        return
+    if game.id is None:
+        db.session.flush()
+    unindex_game(game.id)
+    db.session.execute(
+        text(f"INSERT INTO {FTS_TABLE} (rowid, title, category) VALUES (:id, :title, :category)"),
+        {"id": game.id, "title": game.title or "", "category": game.category or ""},
+    )
+
+
+def unindex_game(game_id):
+    """Remove one game from the index; runs in the caller's transaction"""
+    if not fts_enabled():
+        return
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": game_id})
+
+
+def to_match_query(query):
+    """Turn free text into an FTS5 query: every word must match as a prefix"""
+    return " ".join(f'"{token}"*' for token in _TOKEN_RE.findall(query.lower()))
+
+
+def search_game_ids(query, limit=None):
+    """Game IDs matching query, best match first"""
+    match = to_match_query(query)
+    if not match:
+        return []
+    sql = (
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match "
+        f"ORDER BY bm25({FTS_TABLE}, {TITLE_WEIGHT}, {CATEGORY_WEIGHT})"
+    )
+    params = {"match": match}
+    if limit is not None:
+        sql += " LIMIT :limit"
+        params["limit"] = limit
+    return [row[0] for row in db.session.execute(text(sql), params)]
+
+
+def search_games(query, limit=None):
+    """Games matching query, ranked by relevance"""
+    if not fts_enabled():
+        pattern = f"%{query}%"
+        games = Game.query.filter(or_(Game.title.ilike(pattern), Game.category.ilike(pattern)))
+        return games.limit(limit).all() if limit is not None else games.all()
+
+    ids = search_game_ids(query, limit)
+    if not ids:
+        return []
+    games = {game.id: game for game in Game.query.filter(Game.id.in_(ids)).all()}
+    return [games[game_id] for game_id in ids if game_id in games]
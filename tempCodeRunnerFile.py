@@ -1,28 +1,106 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, session, jsonify, abort, stream_with_context
+from sqlalchemy.orm import joinedload
+from werkzeug.security import generate_password_hash
 from werkzeug.utils import secure_filename
-from models import db, User, Game, Order, OrderItem, Admin, PasswordResetToken, Review, ActivityLog, Notification
+from models import db, User, Game, Order, Admin, Review, ActivityLog, Notification
+from cart_service import price_cart
+from cart_store import create_cart_store, new_cart_id, SqliteCartStore
+from search_service import create_search_index, rebuild_search_index, search_games, index_game, unindex_game
+from pagination import paginate_request, parse_page_size, resolve_sort, InvalidCursor
+from order_stats import order_stats_summary, record_status_change, ensure_order_stats, rebuild_order_stats
+from library_service import purchased_games, owned_game_ids, revoke_order, backfill_user_library, ensure_user_library
+from schema_audit import ensure_columns, ensure_indexes, log_audit, print_audit
+from rating_service import apply_rating_change, reconcile_ratings
+import notification_service
+from notification_dispatcher import NotificationDispatcher
+from password_service import create_password_service, PasswordServiceBusy
+from rate_limiter import create_rate_limiter
+import reset_tokens
+import activity_log
+import catalog_cache
+from catalog_cache import create_catalog_cache, bump_catalog_version, ensure_catalog_version
+from activity_log import ActivityLogWriter, log_activity
+from response_cache import create_response_caches, cache_anonymous_page, cached_fragment
+from db_profiles import apply_database_profile, install_sqlite_pragmas
+from db_routing import configure_replicas, install_read_your_writes, use_replica, reporting_engine
+from admin_export import EXPORTS, FORMATS, generate_export
+from instrumentation import create_instrumentation
+from current_user import create_navbar_cache, current_user, navbar_user, invalidate_navbar_user
+from checkout_service import place_order, InsufficientBalance
 from decimal import Decimal
 from datetime import datetime, timedelta
-import random
 import os
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.urandom(24)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///gaming_store.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL') or 'sqlite:///gaming_store.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+apply_database_profile(app, os.environ.get('DB_PROFILE', 'development'))  # development | testing | production
+# Comma-separated read replica URLs; reads of @use_replica views go there
+configure_replicas(app, [url for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url])
+app.config['REPLICA_STICKY_SECONDS'] = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
 app.config['UPLOAD_FOLDER'] = 'static/uploads/profiles'
 app.config['MAX_CONTENT_LENGTH'] = 5 * 1024 * 1024  # 5MB max file size
+app.config['CART_BACKEND'] = os.environ.get('CART_BACKEND', 'sqlite')  # memory | sqlite | redis
+app.config['CART_REDIS_URL'] = os.environ.get('CART_REDIS_URL')
+app.config['CART_IDLE_DAYS'] = int(os.environ.get('CART_IDLE_DAYS', 30))  # `flask purge-idle-carts` drops older carts
+app.config['ORDER_STATS_MATERIALIZED'] = os.environ.get('ORDER_STATS_MATERIALIZED') == '1'
+app.config['QUERY_PLAN_AUDIT'] = os.environ.get('QUERY_PLAN_AUDIT') == '1'
+app.config['NOTIFICATION_ASYNC'] = os.environ.get('NOTIFICATION_ASYNC', '1') == '1'
+app.config['NOTIFICATION_QUEUE_SIZE'] = int(os.environ.get('NOTIFICATION_QUEUE_SIZE', 10000))
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+app.config['PASSWORD_EXECUTOR'] = os.environ.get('PASSWORD_EXECUTOR', 'process')  # process | thread | inline
+app.config['RATE_LIMIT_BACKEND'] = os.environ.get('RATE_LIMIT_BACKEND', 'memory')  # memory | sqlite
+app.config['ACTIVITY_LOG_BUFFERED'] = os.environ.get('ACTIVITY_LOG_BUFFERED', '0') == '1'
+app.config['ACTIVITY_LOG_BATCH_SIZE'] = int(os.environ.get('ACTIVITY_LOG_BATCH_SIZE', 100))
+app.config['ACTIVITY_LOG_FLUSH_MS'] = int(os.environ.get('ACTIVITY_LOG_FLUSH_MS', 250))
+app.config['CATALOG_CACHE'] = os.environ.get('CATALOG_CACHE', '1') == '1'
+app.config['CATALOG_CACHE_TTL'] = int(os.environ.get('CATALOG_CACHE_TTL', 300))  # seconds
+app.config['CATALOG_CACHE_SIZE'] = int(os.environ.get('CATALOG_CACHE_SIZE', 5000))
+app.config['PAGE_CACHE'] = os.environ.get('PAGE_CACHE', '1') == '1'
+app.config['PAGE_CACHE_TTL'] = int(os.environ.get('PAGE_CACHE_TTL', 300))  # seconds
+app.config['NAVBAR_CACHE_TTL'] = int(os.environ.get('NAVBAR_CACHE_TTL', 60))  # seconds, 0 = off
+app.config['RESET_TOKEN_SWEEP_INTERVAL'] = int(os.environ.get('RESET_TOKEN_SWEEP_INTERVAL', 600))  # seconds, 0 = off; starts with the first request served
+# Create/upgrade the schema and seed data on import; set to 0 in production and run `flask --app tempCodeRunnerFile init-db` on deploy
+app.config['AUTO_INIT_DB'] = os.environ.get('AUTO_INIT_DB', '1') == '1'
+# Per-endpoint timing, SQL and template metrics on /metrics; off unless INSTRUMENTATION=1
+app.config['INSTRUMENTATION'] = os.environ.get('INSTRUMENTATION', '0') == '1'
+app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))  # fraction of requests run under cProfile
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR')  # default: instance/profiles
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 db.init_app(app)
+install_sqlite_pragmas(app, db)
+install_read_your_writes(app, db)
+instrumentation = create_instrumentation(app, db)
+cart_store = create_cart_store(app)
+passwords = create_password_service(app)
+rate_limiter = create_rate_limiter(app)
+notification_dispatcher = None
+if app.config['NOTIFICATION_ASYNC']:
+    notification_dispatcher = NotificationDispatcher(app, max_queue=app.config['NOTIFICATION_QUEUE_SIZE'])
+    notification_service.install_dispatcher(app, notification_dispatcher)
+
+catalog = create_catalog_cache(app)
+navbar_cache = create_navbar_cache(app)
+page_cache, fragment_cache = create_response_caches(app)
+
+activity_log_writer = None
+if app.config['ACTIVITY_LOG_BUFFERED']:
+    activity_log_writer = ActivityLogWriter(app, batch_size=app.config['ACTIVITY_LOG_BATCH_SIZE'],
+                                            flush_interval_ms=app.config['ACTIVITY_LOG_FLUSH_MS'])
+    activity_log.install_writer(app, activity_log_writer)
 
 # ================= DATABASE INIT =================
-with app.app_context():
+def init_database():
+    """Create missing tables, columns and indexes, seed games and the default admin, and build derived tables"""
     db.create_all()
+    if "games.rating_count" in ensure_columns():
+        reconcile_ratings()  # fill the new aggregate from existing reviews
+    ensure_indexes()
 
     # Add games if not existing
     if not Game.query.first():
@@ -49,21 +127,71 @@ with app.app_context():
         db.session.add(default_admin)
         db.session.commit()
 
+    create_search_index()
+    ensure_catalog_version()
+    ensure_order_stats()
+    ensure_user_library()
+    notification_service.ensure_notification_counters()
+
+
+if app.config['AUTO_INIT_DB']:
+    with app.app_context():
+        init_database()
+
+if app.config['QUERY_PLAN_AUDIT']:
+    with app.app_context():
+        log_audit(app.logger)
+
+if app.config['RESET_TOKEN_SWEEP_INTERVAL']:
+    reset_tokens.install_sweeper(app, app.config['RESET_TOKEN_SWEEP_INTERVAL'])
+
+
+# ================= LISTING SORT KEYS =================
+# {sort name: (column, descending)}; ties are always broken by primary key
+GAME_SORTS = {"newest": (Game.date_added, True), "oldest": (Game.date_added, False)}
+USER_SORTS = {"id": (User.id, False), "newest": (User.date_created, True)}
+ORDER_SORTS = {"newest": (Order.order_date, True), "oldest": (Order.order_date, False)}
+
+
+# ================= PASSWORDS =================
+def check_login_password(account, password):
+    """Verify a User/Admin password, upgrading outdated hashes in place (caller commits)"""
+    matches, needs_rehash = passwords.verify(account.password, password)
+    if needs_rehash:
+        account.password = passwords.hash(password)
+    return matches
+
+
+@app.errorhandler(PasswordServiceBusy)
+def password_service_busy(e):
+    return "<h2>Too many sign-in attempts right now, please try again in a moment.</h2>", 503
+
 
 # ================= CART SESSION INIT =================
 def init_cart():
-    if "cart" not in session:
-        session["cart"] = {}
+    """Return the session's cart ID; the cart lines themselves live in cart_store"""
+    if "cart_id" not in session:
+        session["cart_id"] = new_cart_id()
+    return session["cart_id"]
+
+
+def load_priced_cart():
+    """Price the current cart in one query and drop lines for deleted games"""
+    cart_id = init_cart()
+    priced = price_cart(cart_store.get(cart_id))
+    if priced.stale_ids:
+        cart_store.remove(cart_id, *priced.stale_ids)
+    return priced
 
 
 # ================= HOME PAGE =================
 @app.route("/")
+@use_replica
+@cache_anonymous_page
 def home():
     user_logged_in = 'user_id' in session
     username = session.get('username', '')
-    user = None
-    if session.get('user_id'):
-        user = User.query.get(session['user_id'])
+    user = navbar_user()
     return render_template("index.html", user_logged_in=user_logged_in, username=username, user=user)
 
 
@@ -77,7 +205,8 @@ def login():
         # Check if admin login (@admin.com)
         if email.endswith("@admin.com"):
             admin = Admin.query.filter_by(email=email).first()
-            if admin and check_password_hash(admin.password, password):
+            if admin and check_login_password(admin, password):
+                db.session.commit()
                 session["admin_id"] = admin.id
                 session["admin_name"] = admin.name
                 session["is_admin"] = True
@@ -89,18 +218,13 @@ def login():
         # Regular user login
         user = User.query.filter_by(email=email).first()
 
-        if user and check_password_hash(user.password, password):
+        if user and check_login_password(user, password):
             session["user_id"] = user.id
             session["username"] = user.username
             session["is_admin"] = False
             
             # Create welcome notification
-            welcome_notification = Notification(
-                user_id=user.id,
-                message=f"Welcome back, {user.username}! We're glad to have you here.",
-                is_read=False
-            )
-            db.session.add(welcome_notification)
+            notification_service.notify(user.id, f"Welcome back, {user.username}! We're glad to have you here.")
             db.session.commit()
             
             flash("Login successful!", "success")
@@ -130,7 +254,7 @@ def register():
                 return render_template("register.html")
             
             # Create new admin
-            hashed_password = generate_password_hash(password)
+            hashed_password = passwords.hash(password)
             new_admin = Admin(name=username, email=email, password=hashed_password)
             db.session.add(new_admin)
             db.session.commit()
@@ -147,7 +271,7 @@ def register():
             flash("Email already registered!", "error")
             return render_template("register.html")
 
-        hashed_password = generate_password_hash(password)
+        hashed_password = passwords.hash(password)
         new_user = User(username=username, email=email, password=hashed_password, balance=Decimal("100.00"))
         db.session.add(new_user)
         db.session.commit()
@@ -164,6 +288,8 @@ def register():
 
 @app.route("/logout")
 def logout():
+    if session.get("cart_id"):
+        cart_store.clear(session["cart_id"])
     session.clear()
     flash("Logged out successfully!", "info")
     return redirect(url_for("home"))
@@ -187,23 +313,8 @@ def forgot_password():
             flash("If account exists, a reset code has been sent!", "success")
             return render_template("password_reset_request.html")
 
-        # Generate 6-digit code
-        reset_code = str(random.randint(100000, 999999))
-        
-        # Set expiration (15 minutes)
-        expires_at = datetime.utcnow() + timedelta(minutes=15)
-        
-        # Invalidate any existing tokens for this email
-        PasswordResetToken.query.filter_by(email=email, used=False).update({"used": True})
-        db.session.commit()
-        
-        # Create new token
-        reset_token = PasswordResetToken(
-            email=email,
-            token=reset_code,
-            expires_at=expires_at
-        )
-        db.session.add(reset_token)
+        # Generate 6-digit code (valid 15 minutes), replacing any existing code for this email
+        reset_code = reset_tokens.issue_token(email)
         db.session.commit()
 
         # In production, send email here. For demo, print to console
@@ -221,24 +332,20 @@ def verify_reset_code(email):
         code = request.form.get('code')
         
         # Find valid token
-        token = PasswordResetToken.query.filter_by(
-            email=email,
-            token=code,
-            used=False
-        ).first()
+        token = reset_tokens.find_token(email, code)
         
         if not token:
             flash("Invalid reset code!", "error")
             return render_template("password_reset_verify.html", email=email)
         
-        if datetime.utcnow() > token.expires_at:
+        if reset_tokens.is_expired(token):
             flash("Reset code has expired! Please request a new one.", "error")
-            token.used = True
+            reset_tokens.consume_token(token)
             db.session.commit()
             return redirect(url_for("forgot_password"))
         
-        # Don't mark as used yet - allow user to reset password
-        # Token will be marked as used when password is actually reset
+        # Don't consume yet - allow user to reset password
+        # Token will be consumed when password is actually reset
         # Redirect to reset password form with token
         return redirect(url_for("reset_password", email=email, token=code))
     
@@ -258,28 +365,24 @@ def reset_password(email):
             return render_template("password_reset_form.html", email=email)
         
         # Verify token is valid and not used
-        token = PasswordResetToken.query.filter_by(
-            email=email,
-            token=token_code,
-            used=False
-        ).first()
+        token = reset_tokens.find_token(email, token_code)
         
         if not token:
             flash("Invalid or already used reset token! Please request a new one.", "error")
             return redirect(url_for("forgot_password"))
         
-        if datetime.utcnow() > token.expires_at:
+        if reset_tokens.is_expired(token):
             flash("Reset code has expired! Please request a new one.", "error")
-            token.used = True
+            reset_tokens.consume_token(token)
             db.session.commit()
             return redirect(url_for("forgot_password"))
         
         # Update user password
         user = User.query.filter_by(email=email).first()
         if user:
-            user.password = generate_password_hash(password)
-            # Mark token as used
-            token.used = True
+            user.password = passwords.hash(password)
+            # Consume the token
+            reset_tokens.consume_token(token)
             db.session.commit()
             flash("Password reset successful! Please login with your new password.", "success")
             return redirect(url_for("login"))
@@ -289,16 +392,13 @@ def reset_password(email):
     
     # GET request - verify token is valid
     if token_code:
-        token = PasswordResetToken.query.filter_by(
-            email=email,
-            token=token_code
-        ).first()
+        token = reset_tokens.find_token(email, token_code)
         
         if not token:
             flash("Invalid reset token!", "error")
             return redirect(url_for("forgot_password"))
         
-        if datetime.utcnow() > token.expires_at:
+        if reset_tokens.is_expired(token):
             flash("Reset code has expired! Please request a new one.", "error")
             return redirect(url_for("forgot_password"))
     
@@ -307,18 +407,34 @@ def reset_password(email):
 
 # ================= BROWSE =================
 @app.route("/browse")
+@use_replica
+@cache_anonymous_page
 def browse():
     query = request.args.get("q", "")
-    games = Game.query.filter(Game.title.ilike(f"%{query}%")).all() if query else Game.query.all()
-    user = None
-    if session.get('user_id'):
-        user = User.query.get(session['user_id'])
-    return render_template("browse.html", games=games, user=user)
+    page = None
+    if query:
+        games = search_games(query, limit=parse_page_size(request.args.get("per_page")))
+    else:
+        try:
+            page = catalog_cache.games_page(resolve_sort(request.args.get("sort"), GAME_SORTS, "newest"), GAME_SORTS,
+                                            request.args.get("cursor"), parse_page_size(request.args.get("per_page")))
+        except InvalidCursor:
+            abort(400)
+        games = page.items
+    user = navbar_user()
+    owned_ids = owned_game_ids(session.get('user_id'), [game.id for game in games])
+    game_grid = cached_fragment((tuple(game.id for game in games), tuple(sorted(owned_ids))),
+                                "game_grid.html", games=games, owned_ids=owned_ids)
+    return render_template("browse.html", games=games, page=page, q=query, user=user, game_grid=game_grid)
 
 
 @app.route("/game/<int:game_id>")
+@use_replica
+@cache_anonymous_page
 def game_review(game_id):
-    game = Game.query.get_or_404(game_id)
+    game = catalog_cache.get_game(game_id)
+    if game is None:
+        abort(404)
     all_reviews = Review.query.filter_by(game_id=game_id).order_by(Review.created_at.desc()).all()
     
     # Get current user's review if exists
@@ -326,7 +442,7 @@ def game_review(game_id):
     other_reviews = []
     user = None
     if session.get('user_id'):
-        user = User.query.get(session['user_id'])
+        user = navbar_user()
         user_review = Review.query.filter_by(game_id=game_id, user_id=session['user_id']).first()
         # Filter out user's review from other reviews
         other_reviews = [r for r in all_reviews if r.user_id != session['user_id']]
@@ -364,15 +480,12 @@ def add_review(game_id):
     )
     
     db.session.add(new_review)
+    apply_rating_change(game_id, None, new_review.rating)
+    bump_catalog_version()  # cached game pages show the reviews
     
     # Create notification for review
-    game = Game.query.get(game_id)
-    notification = Notification(
-        user_id=session['user_id'],
-        message=f"You added a review for {game.title}",
-        is_read=False
-    )
-    db.session.add(notification)
+    game = catalog_cache.get_game(game_id)
+    notification_service.notify(session['user_id'], f"You added a review for {game.title}")
     db.session.commit()
     
     flash("Review added successfully!", "success")
@@ -400,9 +513,11 @@ def edit_review(game_id, review_id):
         return redirect(url_for("game_review", game_id=game_id))
     
     # Update review
+    apply_rating_change(review.game_id, review.rating, float(rating) if rating else None)
     review.comment = comment
     review.rating = float(rating) if rating else None
     review.updated_at = datetime.utcnow()
+    bump_catalog_version()
     
     db.session.commit()
     
@@ -423,6 +538,8 @@ def delete_review(game_id, review_id):
         flash("You can only delete your own reviews!", "error")
         return redirect(url_for("game_review", game_id=game_id))
     
+    apply_rating_change(review.game_id, review.rating, None)
+    bump_catalog_version()
     db.session.delete(review)
     db.session.commit()
     
@@ -433,29 +550,17 @@ def delete_review(game_id, review_id):
 # ================= CART =================
 @app.route("/add_to_cart/<int:game_id>", methods=["POST"])
 def add_to_cart(game_id):
-    init_cart()
-    cart = session["cart"]
-    cart[str(game_id)] = cart.get(str(game_id), 0) + 1
-    session["cart"] = cart
+    cart_store.increment(init_cart(), game_id)
     return redirect(url_for("cart"))
 
 
 @app.route("/cart")
 def cart():
-    init_cart()
-    cart_data = []
-    total_price = Decimal("0.00")
-
-    for game_id, qty in session["cart"].items():
-        game = Game.query.get(int(game_id))
-        if game:
-            subtotal = Decimal(game.price) * qty
-            total_price += subtotal
-            cart_data.append({"game": game, "quantity": qty, "subtotal": subtotal})
+    priced = load_priced_cart()
+    cart_data = priced.items
+    total_price = priced.total_price
     
-    user = None
-    if session.get('user_id'):
-        user = User.query.get(session['user_id'])
+    user = navbar_user()
 
     return render_template("cart.html", cart_items=cart_data, total_price=total_price, user=user)
 
@@ -463,20 +568,13 @@ def cart():
 @app.route('/update_cart/<int:game_id>', methods=['POST'])
 def update_cart(game_id):
     quantity = int(request.form.get('quantity', 1))
-    init_cart()
-    cart = session['cart']
-    if str(game_id) in cart:
-        cart[str(game_id)] = quantity
-        session['cart'] = cart
+    cart_store.set_quantity(init_cart(), game_id, quantity)
     return redirect(url_for('cart'))
 
 
 @app.route('/remove_from_cart/<int:game_id>', methods=['POST'])
 def remove_from_cart(game_id):
-    init_cart()
-    if str(game_id) in session["cart"]:
-        del session["cart"][str(game_id)]
-        session.modified = True
+    cart_store.remove(init_cart(), game_id)
     return redirect(url_for('cart'))
 
 
@@ -487,7 +585,7 @@ def profile():
         flash("Please login to view your profile!", "error")
         return redirect(url_for("login"))
 
-    user = User.query.get(session["user_id"])
+    user = current_user()
     if not user:
         flash("User not found!", "error")
         session.clear()
@@ -502,7 +600,7 @@ def edit_profile():
         flash("Please login to edit your profile!", "error")
         return redirect(url_for("login"))
     
-    user = User.query.get(session["user_id"])
+    user = current_user()
     if not user:
         flash("User not found!", "error")
         session.clear()
@@ -562,7 +660,7 @@ def edit_profile():
                 flash("Please enter current password to change password!", "error")
                 return redirect(url_for("edit_profile"))
             
-            if not check_password_hash(user.password, current_password):
+            if not passwords.verify(user.password, current_password)[0]:
                 flash("Current password is incorrect!", "error")
                 return redirect(url_for("edit_profile"))
             
@@ -570,10 +668,11 @@ def edit_profile():
                 flash("New passwords do not match!", "error")
                 return redirect(url_for("edit_profile"))
             
-            user.password = generate_password_hash(new_password)
+            user.password = passwords.hash(new_password)
             flash("Password updated successfully!", "success")
         
         db.session.commit()
+        invalidate_navbar_user(user.id)
         session["username"] = user.username
         flash("Profile updated successfully!", "success")
         return redirect(url_for("profile"))
@@ -587,35 +686,17 @@ def library():
         flash("Please login to view your library!", "error")
         return redirect(url_for("login"))
     
-    user = User.query.get(session["user_id"])
+    user = current_user()
     if not user:
         flash("User not found!", "error")
         session.clear()
         return redirect(url_for("login"))
     
-    # Get all purchased games from completed orders
-    purchased_games = []
-    for order in user.orders:
-        if order.order_status == "Completed" or order.order_status == "Processing":
-            for item in order.items:
-                purchased_games.append({
-                    "title": item.game.title,
-                    "category": item.game.category,
-                    "date_acquired": order.order_date,
-                    "game": item.game
-                })
-    
-    # Sort by date (most recent first)
-    purchased_games.sort(key=lambda x: x["date_acquired"], reverse=True)
-    
-    # Handle sorting
+    # Owned games from the user_library table, joined and sorted in SQL
     sort_by = request.args.get("sort", "date")
-    if sort_by == "title":
-        purchased_games.sort(key=lambda x: x["title"].lower())
-    elif sort_by == "genre" or sort_by == "category":
-        purchased_games.sort(key=lambda x: x["category"] or "")
+    games = purchased_games(user.id, sort_by)
     
-    return render_template("library.html", games=purchased_games, sort=sort_by)
+    return render_template("library.html", games=games, sort=sort_by)
 
 
 @app.route("/notifications")
@@ -623,10 +704,38 @@ def notifications():
     if not session.get("user_id"):
         return redirect(url_for("login"))
     
-    user = User.query.get(session["user_id"])
-    notifications_list = Notification.query.filter_by(user_id=user.id).order_by(Notification.created_at.desc()).all()
+    page = notification_feed_page(session["user_id"])
+    unread = notification_service.unread_count(session["user_id"])
     
-    return render_template("notifications.html", notes=notifications_list)
+    return render_template("notifications.html", notes=page.items, page=page, unread_count=unread)
+
+
+@app.route("/api/notifications")
+def notifications_feed():
+    if not session.get("user_id"):
+        return jsonify({"error": "login required"}), 401
+    
+    page = notification_feed_page(session["user_id"])
+    return jsonify({
+        "items": [
+            {"id": n.id, "message": n.message, "is_read": n.is_read, "created_at": n.created_at.isoformat()}
+            for n in page.items
+        ],
+        "next_cursor": page.next_cursor,
+        "unread_count": notification_service.unread_count(session["user_id"]),
+    })
+
+
+def notification_feed_page(user_id):
+    """Feed page for the cursor/per_page arguments of the current request"""
+    try:
+        return notification_service.feed_page(
+            user_id,
+            cursor=request.args.get("cursor"),
+            page_size=parse_page_size(request.args.get("per_page"), default=notification_service.FEED_PAGE_SIZE),
+        )
+    except InvalidCursor:
+        abort(400)
 
 
 @app.route("/mark-all-read", methods=["POST"])
@@ -634,8 +743,7 @@ def mark_all_read():
     if not session.get("user_id"):
         return redirect(url_for("login"))
     
-    user = User.query.get(session["user_id"])
-    Notification.query.filter_by(user_id=user.id, is_read=False).update({"is_read": True})
+    notification_service.mark_all_read(session["user_id"])
     db.session.commit()
     
     flash("All notifications marked as read!", "success")
@@ -652,7 +760,7 @@ def read_notification(n_id):
         flash("Unauthorized access!", "error")
         return redirect(url_for("notifications"))
     
-    notification.is_read = True
+    notification_service.mark_read(notification)
     db.session.commit()
     
     return redirect(url_for("notifications"))
@@ -661,51 +769,23 @@ def read_notification(n_id):
 # ================= CHECKOUT =================
 @app.route("/checkout", methods=["GET", "POST"])
 def checkout():
-    init_cart()
     if not session.get("user_id"):
         return redirect(url_for("login"))
 
-    user = User.query.get(session["user_id"])
-    cart_data = []
-    total_price = Decimal("0.00")
-
-    for game_id, qty in session["cart"].items():
-        game = Game.query.get(int(game_id))
-        subtotal = Decimal(game.price) * qty
-        total_price += subtotal
-        cart_data.append({"game": game, "quantity": qty, "subtotal": subtotal})
+    user = current_user()
+    priced = load_priced_cart()
+    cart_data = priced.items
+    total_price = priced.total_price
 
     if request.method == "POST":
-        if user.balance >= total_price:
-            new_order = Order(user_id=user.id, total_price=total_price)
-            db.session.add(new_order)
-            db.session.commit()
-
-            for item in cart_data:
-                db.session.add(OrderItem(
-                    order_id=new_order.id,
-                    game_id=item["game"].id,
-                    quantity=item["quantity"],
-                    price_at_purchase=item["game"].price
-                ))
-                
-                # Create notification for each purchased game
-                notification = Notification(
-                    user_id=user.id,
-                    message=f"You purchased {item['game'].title} for ${item['game'].price:.2f} on {datetime.utcnow().strftime('%Y-%m-%d %H:%M')}",
-                    is_read=False
-                )
-                db.session.add(notification)
-
-            user.balance -= total_price
-            db.session.commit()
-
-            session["cart"] = {}
-            return redirect(url_for("checkout_success"))
-
-        else:
+        try:
+            place_order(user.id, cart_data, total_price)
+        except InsufficientBalance:
             return "<h2>Insufficient balance!</h2>"
 
+        cart_store.clear(init_cart())
+        return redirect(url_for("checkout_success"))
+
     return render_template("checkout.html", cart_items=cart_data, total_price=total_price, user=user)
 
 
@@ -729,6 +809,7 @@ def admin_required(f):
 
 @app.route("/admin/dashboard")
 @admin_required
+@use_replica
 def admin_dashboard():
     users_count = User.query.count()
     games_count = Game.query.count()
@@ -744,9 +825,10 @@ def admin_dashboard():
 
 @app.route("/admin/games")
 @admin_required
+@use_replica
 def admin_games():
-    games = Game.query.order_by(Game.date_added.desc()).all()
-    return render_template("admin_games.html", games=games)
+    page = paginate_request(Game.query, GAME_SORTS, "newest", Game.id)
+    return render_template("admin_games.html", games=page.items, page=page)
 
 
 @app.route("/admin/games/add", methods=["GET", "POST"])
@@ -773,20 +855,12 @@ def admin_add_game():
         )
         
         db.session.add(new_game)
+        db.session.flush()
+        index_game(new_game)
+        bump_catalog_version()
+        log_activity(session.get('admin_id'), "Added game", "Game", new_game.id, f"Added game: {title}")
         db.session.commit()
         
-        # Log activity
-        if session.get('admin_id'):
-            activity = ActivityLog(
-                admin_id=session['admin_id'],
-                action="Added game",
-                target_type="Game",
-                target_id=new_game.id,
-                details=f"Added game: {title}"
-            )
-            db.session.add(activity)
-            db.session.commit()
-        
         flash("Game added successfully!", "success")
         return redirect(url_for("admin_games"))
     
@@ -809,20 +883,11 @@ def admin_edit_game(game_id):
         if request.form.get("image") or request.form.get("image_url"):
             game.image = request.form.get("image") or request.form.get("image_url")
         
+        index_game(game)
+        bump_catalog_version()
+        log_activity(session.get('admin_id'), "Edited game", "Game", game.id, f"Edited game: {game.title}")
         db.session.commit()
         
-        # Log activity
-        if session.get('admin_id'):
-            activity = ActivityLog(
-                admin_id=session['admin_id'],
-                action="Edited game",
-                target_type="Game",
-                target_id=game.id,
-                details=f"Edited game: {game.title}"
-            )
-            db.session.add(activity)
-            db.session.commit()
-        
         flash("Game updated successfully!", "success")
         return redirect(url_for("admin_games"))
     
@@ -836,37 +901,29 @@ def admin_delete_game(game_id):
     game_title = game.title
     
     db.session.delete(game)
+    unindex_game(game_id)
+    bump_catalog_version()
+    log_activity(session.get('admin_id'), "Deleted game", "Game", game_id, f"Deleted game: {game_title}")
     db.session.commit()
     
-    # Log activity
-    if session.get('admin_id'):
-        activity = ActivityLog(
-            admin_id=session['admin_id'],
-            action="Deleted game",
-            target_type="Game",
-            target_id=game_id,
-            details=f"Deleted game: {game_title}"
-        )
-        db.session.add(activity)
-        db.session.commit()
-    
     flash("Game deleted successfully!", "success")
     return redirect(url_for("admin_games"))
 
 
 @app.route("/admin/users")
 @admin_required
+@use_replica
 def admin_users():
     query = request.args.get("q", "")
+    users = User.query
     if query:
-        users = User.query.filter(
+        users = users.filter(
             (User.username.ilike(f"%{query}%")) | 
             (User.email.ilike(f"%{query}%"))
-        ).all()
-    else:
-        users = User.query.all()
+        )
+    page = paginate_request(users, USER_SORTS, "id", User.id)
     
-    return render_template("admin_users.html", users=users, q=query)
+    return render_template("admin_users.html", users=page.items, page=page, q=query)
 
 
 @app.route("/admin/users/<int:user_id>/edit", methods=["GET", "POST"])
@@ -881,19 +938,9 @@ def admin_edit_user(user_id):
         if request.form.get("balance"):
             user.balance = Decimal(request.form.get("balance"))
         
+        log_activity(session.get('admin_id'), "Edited user", "User", user.id, f"Edited user: {user.username}")
         db.session.commit()
-        
-        # Log activity
-        if session.get('admin_id'):
-            activity = ActivityLog(
-                admin_id=session['admin_id'],
-                action="Edited user",
-                target_type="User",
-                target_id=user.id,
-                details=f"Edited user: {user.username}"
-            )
-            db.session.add(activity)
-            db.session.commit()
+        invalidate_navbar_user(user.id)
         
         flash("User updated successfully!", "success")
         return redirect(url_for("admin_users"))
@@ -903,19 +950,18 @@ def admin_edit_user(user_id):
 
 @app.route("/admin/orders")
 @admin_required
+@use_replica
 def admin_orders():
-    orders = Order.query.order_by(Order.order_date.desc()).all()
-    total_orders = Order.query.count()
-    total_revenue = sum([order.total_price for order in Order.query.filter_by(order_status="Completed").all()])
-    completed_count = Order.query.filter_by(order_status="Completed").count()
-    cancelled_count = Order.query.filter_by(order_status="Cancelled").count()
+    page = paginate_request(Order.query.options(joinedload(Order.user)), ORDER_SORTS, "newest", Order.id)
+    stats = order_stats_summary()
     
     return render_template("admin_orders.html",
-                           orders=orders,
-                           total_orders=total_orders,
-                           total_revenue=total_revenue,
-                           completed_count=completed_count,
-                           cancelled_count=cancelled_count)
+                           orders=page.items,
+                           page=page,
+                           total_orders=stats["total_orders"],
+                           total_revenue=stats["total_revenue"],
+                           completed_count=stats["completed_count"],
+                           cancelled_count=stats["cancelled_count"])
 
 
 @app.route("/admin/orders/<int:order_id>", methods=["GET", "POST"])
@@ -924,32 +970,174 @@ def admin_order_detail(order_id):
     order = Order.query.get_or_404(order_id)
     
     if request.method == "POST":
+        record_status_change(order.order_status, "Cancelled", order.total_price)
+        revoke_order(order)
         order.order_status = "Cancelled"
+        log_activity(session.get('admin_id'), "Cancelled order", "Order", order.id, f"Cancelled order #{order.id}")
         db.session.commit()
         
-        # Log activity
-        if session.get('admin_id'):
-            activity = ActivityLog(
-                admin_id=session['admin_id'],
-                action="Cancelled order",
-                target_type="Order",
-                target_id=order.id,
-                details=f"Cancelled order #{order.id}"
-            )
-            db.session.add(activity)
-            db.session.commit()
-        
         flash("Order cancelled!", "success")
         return redirect(url_for("admin_orders"))
     
     return render_template("admin_order_detail.html", order=order)
 
 
+@app.route("/admin/notification-queue")
+@admin_required
+def admin_notification_queue():
+    if notification_dispatcher is None:
+        return jsonify({"async": False})
+    return jsonify({"async": True, **notification_dispatcher.metrics()})
+
+
+@app.route("/admin/catalog-cache")
+@admin_required
+def admin_catalog_cache():
+    return jsonify(catalog.metrics())
+
+
+@app.route("/admin/page-cache")
+@admin_required
+def admin_page_cache():
+    return jsonify({"pages": page_cache.metrics(), "fragments": fragment_cache.metrics()})
+
+
+@app.route("/admin/navbar-cache")
+@admin_required
+def admin_navbar_cache():
+    return jsonify(navbar_cache.metrics())
+
+
+@app.route("/admin/activity-log-writer")
+@admin_required
+def admin_activity_log_writer():
+    if activity_log_writer is None:
+        return jsonify({"buffered": False})
+    return jsonify({"buffered": True, **activity_log_writer.metrics()})
+
+
+@app.route("/admin/rate-limits")
+@admin_required
+def admin_rate_limits():
+    return jsonify(rate_limiter.counters)
+
+
 @app.route("/admin/activity")
 @admin_required
+@use_replica
 def admin_activity():
-    activities = ActivityLog.query.order_by(ActivityLog.date.desc()).limit(50).all()
-    return render_template("admin_activity.html", activities=activities)
+    start, end = parse_date_range()
+    page = paginate_request(activity_log.activity_in_range(start, end), activity_log.ACTIVITY_SORTS, "newest",
+                            ActivityLog.id, default_page_size=activity_log.ACTIVITY_PAGE_SIZE)
+    return render_template("admin_activity.html", activities=page.items, page=page,
+                           date_from=request.args.get("from") or None, date_to=request.args.get("to") or None)
+
+
+@app.route("/admin/export/<kind>.<fmt>")
+@admin_required
+def admin_export(kind, fmt):
+    if kind not in EXPORTS or fmt not in FORMATS:
+        abort(404)
+    start, end = parse_date_range()
+    chunks = generate_export(reporting_engine(db), kind, fmt, start, end)
+    suffix = "".join(f"-{request.args[arg]}" for arg in ("from", "to") if request.args.get(arg))
+    return Response(stream_with_context(chunks), mimetype=FORMATS[fmt],
+                    headers={"Content-Disposition": f'attachment; filename="{kind}{suffix}.{fmt}"'})
+
+
+def parse_date_range():
+    """(start, end) from the optional from/to arguments (YYYY-MM-DD, both days inclusive); 400 if malformed"""
+    date_from = request.args.get("from")
+    date_to = request.args.get("to")
+    try:
+        start = datetime.strptime(date_from, "%Y-%m-%d") if date_from else None
+        end = datetime.strptime(date_to, "%Y-%m-%d") + timedelta(days=1) if date_to else None
+    except ValueError:
+        abort(400)
+    return start, end
+
+
+# ================= CLI =================
+@app.cli.command("init-db")
+def init_db_command():
+    """Create/upgrade the schema and seed default data (replaces AUTO_INIT_DB at startup)"""
+    init_database()
+    print("✓ Database initialized")
+
+
+@app.cli.command("backfill-library")
+def backfill_library_command():
+    """Rebuild the user_library table from existing orders"""
+    count = backfill_user_library()
+    print(f"✓ Backfilled {count} owned games into user_library")
+
+
+@app.cli.command("reconcile-ratings")
+def reconcile_ratings_command():
+    """Repair drift between games.rating_count/rating_sum and the reviews table"""
+    repaired = reconcile_ratings()
+    print(f"✓ Reconciled rating aggregates ({repaired} games repaired)")
+
+
+@app.cli.command("rebuild-order-stats")
+def rebuild_order_stats_command():
+    """Recompute order_status_stats from the orders table (run after re-enabling ORDER_STATS_MATERIALIZED)"""
+    statuses = rebuild_order_stats()
+    print(f"✓ Rebuilt order stats for {statuses} statuses")
+
+
+@app.cli.command("rebuild-search-index")
+def rebuild_search_index_command():
+    """Re-index every game for search, repairing drift from edits made outside the admin routes"""
+    indexed = rebuild_search_index()
+    if indexed is None:
+        print("✓ Nothing to rebuild: this database has no FTS5 search index")
+        return
+    print(f"✓ Re-indexed {indexed} games for search")
+
+
+@app.cli.command("compact-notifications")
+def compact_notifications_command():
+    """Delete read notifications older than the retention window, in batches"""
+    deleted = notification_service.compact_notifications()
+    print(f"✓ Deleted {deleted} old read notifications")
+
+
+@app.cli.command("repair-notification-counters")
+def repair_notification_counters_command():
+    """Recount the unread notification counters from the notifications table"""
+    fixed = notification_service.repair_unread_counters()
+    print(f"✓ Repaired {fixed} unread notification counters")
+
+
+@app.cli.command("sweep-reset-tokens")
+def sweep_reset_tokens_command():
+    """Delete expired password reset tokens in batches"""
+    deleted = reset_tokens.sweep_tokens()
+    print(f"✓ Deleted {deleted} expired password reset tokens")
+
+
+@app.cli.command("purge-idle-carts")
+def purge_idle_carts_command():
+    """Delete database carts (CART_BACKEND=sqlite) untouched for CART_IDLE_DAYS"""
+    if not isinstance(cart_store, SqliteCartStore):
+        print("✓ Nothing to purge: the memory backend is bounded and Redis carts expire on their own")
+        return
+    removed = cart_store.purge_idle(timedelta(days=app.config['CART_IDLE_DAYS']))
+    print(f"✓ Deleted {removed} cart lines from idle carts")
+
+
+@app.cli.command("rotate-activity-log")
+def rotate_activity_log_command():
+    """Move admin activity older than the retention window into activity_logs_archive"""
+    moved = activity_log.rotate_activity_logs()
+    print(f"✓ Archived {moved} old activity log entries")
+
+
+@app.cli.command("audit-indexes")
+def audit_indexes_command():
+    """Create missing indexes and flag full table scans via EXPLAIN QUERY PLAN"""
+    print_audit()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,111 @@
+"""
+Shared fixtures: one app (tempCodeRunnerFile) per test session, on a
+throwaway primary SQLite file plus a snapshot of it as a read replica,
+with caches and background workers off so every query is visible.
+"""
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TMP = tempfile.mkdtemp(prefix="store-tests-")
+PRIMARY = os.path.join(TMP, "primary.db")
+REPLICA = os.path.join(TMP, "replica.db")
+STICKY_SECONDS = 1
+
+# tempCodeRunnerFile reads its configuration at import
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{PRIMARY}",
+    "DATABASE_REPLICA_URLS": f"sqlite:///{REPLICA}",
+    "REPLICA_STICKY_SECONDS": str(STICKY_SECONDS),
+    "DB_PROFILE": "testing",
+    "AUTO_INIT_DB": "1",
+    "PAGE_CACHE": "0",
+    "CATALOG_CACHE": "0",
+    "NAVBAR_CACHE_TTL": "0",
+    "NOTIFICATION_ASYNC": "0",
+    "PASSWORD_EXECUTOR": "inline",
+    "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",
+    "RESET_TOKEN_SWEEP_INTERVAL": "0",
+})
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope="session")
+def app():
+    from jinja2 import FileSystemLoader
+    import tempCodeRunnerFile
+    app = tempCodeRunnerFile.app
+    app.jinja_loader = FileSystemLoader(ROOT)
+    app.config["TESTING"] = True
+    # Snapshot the seeded primary as the replica, before anything connects to it
+    with sqlite3.connect(PRIMARY) as connection:
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    shutil.copy(PRIMARY, REPLICA)
+    yield app
+    shutil.rmtree(TMP, ignore_errors=True)
+
+
+@pytest.fixture
+def db(app):
+    """The models' db; push app.app_context() around direct queries only, since a
+    context left open would be reused (with its g) by the requests under test"""
+    from models import db
+    return db
+
+
+class StatementCounter:
+    """SQL statements sent through one engine while watching"""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @contextmanager
+    def watch(self, engine):
+        from sqlalchemy import event
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        try:
+            yield self
+        finally:
+            event.remove(engine, "before_cursor_execute", self._on_execute)
+
+
+@pytest.fixture
+def count_statements(app, db):
+    """count_statements(fn) -> (fn(), {bind key: StatementCounter}) over the primary and every replica"""
+    with app.app_context():
+        engines = dict(db.engines)
+
+    def run(fn):
+        counters = {key: StatementCounter() for key in engines}
+        watchers = [counters[key].watch(engine) for key, engine in engines.items()]
+        for watcher in watchers:
+            watcher.__enter__()
+        try:
+            return fn(), counters
+        finally:
+            for watcher in watchers:
+                watcher.__exit__(None, None, None)
+    return run
+
+
+def sign_in(client, user_id, username="tester"):
+    with client.session_transaction() as session:
+        session.update(user_id=user_id, username=username, is_admin=False)
+
+
+def sign_in_admin(client, admin_id=1):
+    with client.session_transaction() as session:
+        session.update(admin_id=admin_id, admin_name="Admin", is_admin=True)
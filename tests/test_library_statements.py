@@ -0,0 +1,60 @@
+"""The library is a constant number of SQL statements, however many games the user owns (no N+1)."""
+from decimal import Decimal
+
+import pytest
+
+from conftest import sign_in
+
+# Library page: session user + owned games; purchased_games itself: one joined SELECT
+MAX_PAGE_STATEMENTS = 2
+MAX_QUERY_STATEMENTS = 1
+
+
+def make_owner(app, db, name, owned, orders=1):
+    """A user with `owned` games spread over `orders` completed orders, granted to their library"""
+    from models import User, Game, Order, OrderItem
+    from library_service import grant_games
+    with app.app_context():
+        user = User(username=name, email=f"{name}@example.com", password="x")
+        games = [Game(title=f"{name} game {i}", category=f"Cat {i % 5}", price=Decimal("1.00")) for i in range(owned)]
+        db.session.add(user)
+        db.session.add_all(games)
+        db.session.flush()
+        for n in range(orders):
+            order = Order(user_id=user.id, total_price=Decimal("1.00"), order_status="Completed")
+            order.items = [OrderItem(game_id=game.id, quantity=1, price_at_purchase=Decimal("1.00"))
+                           for game in games[n::orders]]
+            db.session.add(order)
+        grant_games(user.id, [game.id for game in games])
+        db.session.commit()
+        return user.id
+
+
+def total(counters):
+    return sum(counter.count for counter in counters.values())
+
+
+@pytest.mark.parametrize("sort", ["date", "title", "category"])
+def test_library_page_statements_do_not_grow_with_library_size(app, db, count_statements, sort):
+    counts = {}
+    for owned in (1, 40):
+        name = f"reader_{sort}_{owned}"
+        user_id = make_owner(app, db, name, owned, orders=min(owned, 10))
+        client = app.test_client()
+        sign_in(client, user_id, name)
+        response, counters = count_statements(lambda: client.get(f"/library?sort={sort}"))
+        assert response.status_code == 200
+        assert response.data.count(f"{name} game ".encode()) == owned
+        counts[owned] = total(counters)
+
+    assert counts[1] == counts[40] <= MAX_PAGE_STATEMENTS
+
+
+@pytest.mark.parametrize("sort", ["date", "title", "category"])
+def test_purchased_games_is_one_statement(app, db, count_statements, sort):
+    from library_service import purchased_games
+    user_id = make_owner(app, db, f"query_{sort}", 30, orders=10)
+    with app.app_context():
+        rows, counters = count_statements(lambda: [(row["title"], row["game"].id) for row in purchased_games(user_id, sort)])
+    assert {title for title, _ in rows} == {f"query_{sort} game {i}" for i in range(30)}
+    assert total(counters) <= MAX_QUERY_STATEMENTS
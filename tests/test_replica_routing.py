@@ -0,0 +1,81 @@
+"""Read-only views go to the replica; writes, and reads right after a write, go to the primary."""
+import time
+
+import pytest
+
+from conftest import STICKY_SECONDS, sign_in_admin
+
+
+def on_binds(counters):
+    return counters[None].count, counters["replica_0"].count
+
+
+@pytest.fixture
+def admin(app):
+    client = app.test_client()
+    sign_in_admin(client)
+    return client
+
+
+@pytest.fixture
+def shopper(app, request):
+    client = app.test_client()
+    name = request.node.name.removeprefix("test_")[:40]
+    response = client.post("/register", data={"username": name, "email": f"{name}@example.com",
+                                              "password": "pw", "confirm_password": "pw"})
+    assert response.status_code == 302
+    return client
+
+
+@pytest.fixture
+def game_id(app, db):
+    """A game present in the replica snapshot"""
+    from models import Game
+    with app.app_context():
+        return Game.query.order_by(Game.id).first().id
+
+
+def test_anonymous_browse_reads_the_replica(app, count_statements):
+    response, counters = count_statements(lambda: app.test_client().get("/browse"))
+    on_primary, on_replica = on_binds(counters)
+    assert response.status_code == 200
+    assert on_primary == 0 and on_replica > 0
+
+
+def test_admin_reporting_reads_the_replica(admin, count_statements):
+    response, counters = count_statements(lambda: admin.get("/admin/orders"))
+    on_primary, on_replica = on_binds(counters)
+    assert response.status_code == 200
+    assert on_primary == 0 and on_replica > 0
+
+
+def test_writer_reads_its_own_write_until_stickiness_expires(admin, count_statements):
+    # A write the snapshot replica will never see
+    admin.post("/admin/games/add", data={"title": "Primary Only Game", "category": "Test", "price": "1"})
+
+    response, counters = count_statements(lambda: admin.get("/admin/games"))
+    on_primary, on_replica = on_binds(counters)
+    assert b"Primary Only Game" in response.data
+    assert on_primary > 0 and on_replica == 0
+
+    time.sleep(STICKY_SECONDS + 0.2)
+    response, counters = count_statements(lambda: admin.get("/admin/games"))
+    on_primary, on_replica = on_binds(counters)
+    assert b"Primary Only Game" not in response.data
+    assert on_replica > 0
+
+
+def test_checkout_runs_on_the_primary_only(shopper, game_id, count_statements):
+    shopper.post(f"/add_to_cart/{game_id}")
+    response, counters = count_statements(lambda: shopper.post("/checkout"))
+    on_primary, on_replica = on_binds(counters)
+    assert response.status_code == 302
+    assert on_primary > 0 and on_replica == 0
+
+
+def test_reviewer_sees_their_review_from_the_primary(shopper, game_id, count_statements):
+    shopper.post(f"/game/{game_id}/add-review", data={"comment": "Read your writes", "rating": "5"})
+    response, counters = count_statements(lambda: shopper.get(f"/game/{game_id}"))
+    on_primary, on_replica = on_binds(counters)
+    assert b"Read your writes" in response.data
+    assert on_replica == 0